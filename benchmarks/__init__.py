@@ -0,0 +1 @@
+"""benchmarks, run each module with python -m benchmarks.<name>"""
@@ -0,0 +1,56 @@
+"""fixtures and timing helpers shared by the benchmarks"""
+
+import asyncio
+import time
+
+from data import data
+
+SIZES = {"small": 10, "medium": 200, "large": 5000}
+
+
+class Product(data.Item):
+    name = data.TextField(selector="h2")
+    price = data.TextField(selector=".price", coerce=float)
+    tags = data.TextField(selector="li", repeated=True)
+    link = data.AttributeValueField(selector="a", attr="href")
+    body = data.HtmlField(selector=".body")
+
+    class Meta:
+        selector = ".product"
+
+
+def listing(items):
+    """html listing of 'items' products"""
+    return "<html><body>{}</body></html>".format(
+        "".join(
+            "<div class='product'><h2>Product {0}</h2>"
+            "<span class='price'>{0}.99</span><ul><li>new</li>"
+            "<li>tag {1}</li></ul><a href='/p/{0}'>more</a>"
+            "<div class='body'><p>About <b>{0}</b></p></div></div>".format(
+                i, i % 7
+            )
+            for i in range(items)
+        )
+    )
+
+
+def timed(func, repeat=5, number=1):
+    """best and mean seconds of a call over 'repeat' runs of 'number'
+    calls, the best run is the least disturbed by the machine"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    return {"best": min(runs), "mean": sum(runs) / len(runs)}
+
+
+def run_async(coro):
+    """run coro on a fresh event loop"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
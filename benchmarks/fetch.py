@@ -0,0 +1,63 @@
+"""requests per second of urlfetch and UrlFetcher on a local server
+
+    python -m benchmarks.fetch [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from data.fetcher import UrlFetcher
+from data.requests import urlfetch
+from benchmarks.common import SIZES, listing, run_async
+from tests.base import start_server
+
+
+async def throughput(fetch, base, requests, concurrency=20):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await fetch("{}/{}".format(base, i))
+
+    start = time.perf_counter()
+    bodies = await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    assert all(bodies)
+    return {"requests_per_second": requests / elapsed, "seconds": elapsed}
+
+
+async def measure(requests):
+    body = listing(SIZES["small"])
+
+    async def handler(request):
+        return web.Response(text=body, content_type="text/html")
+
+    runner, base = await start_server(handler, access_log=None)
+    fetcher = UrlFetcher(limit_per_host=20)
+    try:
+        return {
+            "urlfetch": await throughput(urlfetch, base, requests),
+            "UrlFetcher": await throughput(fetcher.fetch, base, requests),
+        }
+    finally:
+        await fetcher.close()
+        await runner.cleanup()
+
+
+def run(requests=500):
+    return run_async(measure(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""memory held per item by eager items, detached items and records
+
+    python -m benchmarks.memory [--items N]
+
+Prints a json report of the bytes allocated per kept item, including
+the parsed document the items keep alive.
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from data.document import Document
+from benchmarks.common import Product, listing
+
+
+class CompactProduct(Product):
+    class Meta:
+        selector = ".product"
+        compact = True
+
+
+def eager(html):
+    document = Document(html)
+    return [Product(item=node) for node in Product._select(document)]
+
+
+def detached(html):
+    return [item.detach() for item in eager(html)]
+
+
+def compact(html):
+    document = Document(html)
+    return CompactProduct._finish(
+        [CompactProduct(item=node) for node in Product._select(document)]
+    )
+
+
+def measure(build, html, items):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(html)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(kept) == items
+    return {
+        "bytes": after - before,
+        "bytes_per_item": (after - before) / items,
+    }
+
+
+def run(items=5000):
+    html = listing(items)
+    return {
+        "items": items,
+        "results": {
+            build.__name__: measure(build, html, items)
+            for build in (eager, detached, compact)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items), indent=2))
+
+
+if __name__ == "__main__":
+    main()
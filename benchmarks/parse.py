@@ -0,0 +1,63 @@
+"""parse time, per field extraction cost and item instantiation rate
+
+    python -m benchmarks.parse
+"""
+
+import json
+
+from data.document import Document
+from data.parsers import PARSERS
+from benchmarks.common import SIZES, Product, listing, timed
+
+
+def parse_times():
+    """seconds to parse each fixture size with each installed parser"""
+    results = {}
+    for name, parser in PARSERS.items():
+        if not parser.is_available():
+            continue
+        for size, items in SIZES.items():
+            html = listing(items)
+            results["{}/{}".format(name, size)] = timed(
+                lambda: parser.parse(html)
+            )
+    return results
+
+
+def field_costs():
+    """seconds per item to extract each field on its own"""
+    html = listing(SIZES["medium"])
+    nodes = Product._select(Document(html))
+    results = {}
+    for name, field in Product._fields.items():
+        results[name] = timed(
+            lambda: [field.get_value(node) for node in nodes]
+        )
+        for key in results[name]:
+            results[name][key] /= len(nodes)
+    return results
+
+
+def instantiation():
+    """items built per second from an already parsed document"""
+    document = Document(listing(SIZES["large"]))
+    nodes = Product._select(document)
+    seconds = timed(
+        lambda: [Product(item=node, document=document) for node in nodes]
+    )
+    return {
+        "items_per_second": len(nodes) / seconds["best"],
+        "seconds": seconds,
+    }
+
+
+def run():
+    return {
+        "parse": parse_times(),
+        "fields": field_costs(),
+        "instantiation": instantiation(),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
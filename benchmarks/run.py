@@ -0,0 +1,62 @@
+"""run every benchmark and emit a single json report
+
+    python -m benchmarks.run [--output FILE] [--only NAME ...]
+
+The report carries the commit and python version so reports of two
+commits can be compared.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+from benchmarks import fetch, memory, parse, subpages
+
+BENCHMARKS = {
+    "fetch": fetch.run,
+    "parse": parse.run,
+    "subpages": subpages.run,
+    "memory": memory.run,
+}
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None):
+    report = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "time": time.time(),
+        "results": {},
+    }
+    for name in names or BENCHMARKS:
+        report["results"][name] = BENCHMARKS[name]()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the report to this file")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+    report = json.dumps(run(args.only), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""latency of the SubPageFields fan-out on a local server
+
+    python -m benchmarks.subpages [--links N] [--delay SECONDS]
+
+Every sub page answers after 'delay', so with a concurrent fan-out the
+latency stays close to one delay whatever the number of links.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from data import data
+from data.fetcher import UrlFetcher
+from benchmarks.common import run_async
+from tests.base import start_server
+
+
+class Detail(data.Item):
+    title = data.TextField(selector="h1")
+
+
+class Index(data.Item):
+    details = data.SubPageFields(Detail, link_selector="a")
+
+    class Meta:
+        fetcher = UrlFetcher
+        limit_per_host = 100
+
+
+async def measure(links, delay):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return web.Response(text="<h1>{}</h1>".format(request.path))
+
+    runner, base = await start_server(handler, access_log=None)
+    index = Index(
+        "".join("<a href='{}/{}'></a>".format(base, i) for i in range(links))
+    )
+    try:
+        start = time.perf_counter()
+        details = await index.details
+        elapsed = time.perf_counter() - start
+    finally:
+        await Index.close()
+        await runner.cleanup()
+    assert len(details) == links
+    return {
+        "links": links,
+        "delay": delay,
+        "seconds": elapsed,
+        "overhead_per_link": (elapsed - delay) / links,
+    }
+
+
+def run(links=100, delay=0.05):
+    return run_async(measure(links, delay))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+    print(json.dumps(run(args.links, args.delay), indent=2))
+
+
+if __name__ == "__main__":
+    main()
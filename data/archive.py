@@ -0,0 +1,81 @@
+"""compressed archives of recorded responses"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from data.requests import Response, normalize_url
+
+
+def archive_key(url, method="GET"):
+    """responses are keyed by method and normalized url"""
+    return "{} {}".format(method.upper(), normalize_url(url))
+
+
+class Archive(object):
+    """Recorded responses in a sqlite file at 'path', bodies and headers
+    are zlib compressed. Recording a url again replaces its response."""
+
+    def __init__(self, path, level=6):
+        self.path = path
+        self.level = level
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT, status INTEGER, "
+            "headers BLOB, body BLOB, recorded REAL)"
+        )
+        self._db.commit()
+
+    def _pack(self, value):
+        return zlib.compress(value.encode("utf-8"), self.level)
+
+    @staticmethod
+    def _unpack(value):
+        return zlib.decompress(value).decode("utf-8")
+
+    def put(self, response, method="GET", url=None):
+        """stores a Response under the requested 'url', the url of the
+        response by default. Redirected responses carry the url they
+        were redirected to, which is not the one replayed."""
+        headers = json.dumps(dict(response.headers or {}))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    archive_key(url or response.url, method),
+                    response.url,
+                    response.status,
+                    self._pack(headers),
+                    self._pack(response.body or ""),
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def get(self, url, method="GET"):
+        """the recorded Response of url or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body FROM responses "
+                "WHERE key = ?",
+                (archive_key(url, method),),
+            ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body = row
+        return Response(
+            url, status, json.loads(self._unpack(headers)), self._unpack(body)
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+    def close(self):
+        self._db.close()
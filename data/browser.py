@@ -0,0 +1,73 @@
+"""asyncio native headless browsers rendering pages in tabs
+
+A browser opens tabs with 'new_tab(blocked)', a tab renders urls with
+'render(url, wait_for, wait_until, timeout)' and both are closed with
+'close'. PlaywrightBrowser drives chromium, any object with the same
+methods can be given to BrowserFetcher as 'driver_factory'.
+"""
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # pragma: no cover
+    async_playwright = None
+
+BLOCKED_RESOURCES = ("image", "font", "stylesheet", "media")
+
+
+class PlaywrightTab(object):
+    """A page in its own browser context."""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+
+    async def render(
+        self, url, wait_for=None, wait_until="load", timeout=None
+    ):
+        options = {"wait_until": wait_until}
+        if timeout is not None:
+            options["timeout"] = timeout * 1000
+        await self.page.goto(url, **options)
+        if wait_for:
+            await self.page.wait_for_selector(wait_for)
+        return await self.page.content()
+
+    async def close(self):
+        await self.context.close()
+
+
+class PlaywrightBrowser(object):
+    """One headless chromium process shared by every tab."""
+
+    def __init__(self, playwright, browser):
+        self.playwright = playwright
+        self.browser = browser
+
+    @classmethod
+    async def launch(cls, **options):
+        if async_playwright is None:
+            raise ImportError(
+                "BrowserFetcher needs playwright installed, "
+                "or a driver_factory returning a browser"
+            )
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(headless=True, **options)
+        return cls(playwright, browser)
+
+    async def new_tab(self, blocked=()):
+        context = await self.browser.new_context()
+        page = await context.new_page()
+        if blocked:
+
+            async def block(route):
+                if route.request.resource_type in blocked:
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await page.route("**/*", block)
+        return PlaywrightTab(context, page)
+
+    async def close(self):
+        await self.browser.close()
+        await self.playwright.stop()
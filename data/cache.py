@@ -0,0 +1,134 @@
+"""response caches for the fetcher layer"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+class CacheEntry(namedtuple("CacheEntry", "body etag last_modified stored")):
+    """cached body with the validators sent on revalidation"""
+
+    @classmethod
+    def from_response(cls, body, headers=None):
+        headers = headers or {}
+        return cls(
+            body,
+            headers.get("ETag"),
+            headers.get("Last-Modified"),
+            time.time(),
+        )
+
+    def is_fresh(self, max_age):
+        """whether the entry can be served without asking the server"""
+        return bool(max_age) and time.time() - self.stored < max_age
+
+    def validators(self):
+        """conditional request headers for this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CacheStats(object):
+    """hit and miss counters of a cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+
+    def hit(self, entry, revalidated=False):
+        self.hits += 1
+        self.bytes_saved += len(entry.body or "")
+        if revalidated:
+            self.revalidated += 1
+
+    def miss(self):
+        self.misses += 1
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class BaseCache(object):
+    """Base response cache, keyed by url."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        """returns the CacheEntry of the key or None"""
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        """stores a CacheEntry under key"""
+        raise NotImplementedError
+
+    def touch(self, key, entry):
+        """marks a revalidated entry as fresh"""
+        self.set(key, entry._replace(stored=time.time()))
+
+
+class MemoryCache(BaseCache):
+    """In memory LRU cache holding at most 'maxsize' responses."""
+
+    def __init__(self, maxsize=1024):
+        super(MemoryCache, self).__init__()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """On disk cache stored in a sqlite database at 'path'."""
+
+    def __init__(self, path):
+        super(SQLiteCache, self).__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT, etag TEXT, "
+            "last_modified TEXT, stored REAL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, stored FROM responses "
+                "WHERE url = ?",
+                (key,),
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def set(self, key, entry):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key,) + tuple(entry),
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,162 @@
+"""following next page links with a pool of workers"""
+
+import asyncio
+import hashlib
+import math
+
+from data.requests import normalize_url
+
+
+class SeenSet(object):
+    """Exact set of visited urls."""
+
+    def __init__(self):
+        self._urls = set()
+
+    def add(self, url):
+        """adds url, returns False when it was already seen"""
+        if url in self._urls:
+            return False
+        self._urls.add(url)
+        return True
+
+    def __contains__(self, url):
+        return url in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+
+class BloomFilter(object):
+    """Probabilistic set of visited urls for very large crawls.
+    Memory is fixed by 'capacity' and 'error_rate', at the cost of
+    skipping an unseen url with probability 'error_rate'."""
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, url):
+        digest = hashlib.sha1(url.encode("utf-8")).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, url):
+        """adds url, returns False when it was probably seen"""
+        new = False
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, url):
+        return all(
+            self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(url)
+        )
+
+    def __len__(self):
+        return self.count
+
+
+class Crawler(object):
+    """Crawls an item across its pages.
+
+    Starting from one url, 'workers' tasks fetch pages from a shared
+    frontier queue, extract the items and queue the links matched by
+    'next_selector' that were not seen before. 'max_pages' bounds the
+    number of pages fetched and 'max_depth' how many links are followed
+    from the start page.
+    """
+
+    def __init__(
+        self,
+        item,
+        next_selector=None,
+        workers=4,
+        max_pages=None,
+        max_depth=None,
+        seen=None,
+    ):
+        meta = item._meta
+        self.item = item
+        self.next_selector = next_selector or meta.next_selector
+        self.workers = workers
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.seen = seen if seen is not None else SeenSet()
+        self.pages = 0
+        self.errors = []
+
+    def _schedule(self, queue, url, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            return
+        if self.seen.add(url):
+            self.pages += 1
+            queue.put_nowait((url, depth))
+
+    def next_links(self, document):
+        """normalized urls of the next pages linked from document"""
+        if not self.next_selector:
+            return []
+        base = document.url or self.item._meta.base_url
+        return [
+            normalize_url(node.get("href"), base)
+            for node in document.select(self.next_selector)
+            if node.get("href")
+        ]
+
+    async def _worker(self, queue, results):
+        kwargs = self.item._meta._qkwargs
+        while True:
+            url, depth = await queue.get()
+            try:
+                document = await self.item._get_document(url=url, **kwargs)
+                for item in await self.item._build(document):
+                    await results.put(item)
+                for link in self.next_links(document):
+                    self._schedule(queue, link, depth + 1)
+            except Exception as exc:
+                self.errors.append((url, exc))
+            finally:
+                queue.task_done()
+
+    async def crawl(self, path=""):
+        """yields the items of every crawled page as they are extracted"""
+        queue = asyncio.Queue()
+        results = asyncio.Queue(maxsize=self.workers * 64)
+        done = object()
+        self._schedule(queue, normalize_url(path, self.item._meta.base_url), 0)
+        workers = [
+            asyncio.ensure_future(self._worker(queue, results))
+            for _ in range(self.workers)
+        ]
+
+        async def finish():
+            await queue.join()
+            await results.put(done)
+
+        finisher = asyncio.ensure_future(finish())
+        try:
+            while True:
+                item = await results.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            for task in workers + [finisher]:
+                task.cancel()
+            await asyncio.gather(*workers, finisher, return_exceptions=True)
+
+    async def run(self, path=""):
+        """crawls and returns every item"""
+        return [item async for item in self.crawl(path)]
@@ -2,17 +2,25 @@
 
 import asyncio
 import hashlib
+import json
 import warnings
-from functools import partial
-from bs4 import BeautifulSoup
 from bs4.element import Tag
 from untangle import parse
 from urllib.parse import urljoin, urlparse
-from data.fetcher import select_default_fetcher
+from data.crawler import Crawler
+from data import offload
+from data.document import Document, parse_html, tag_to_element
+from data.requests import normalize_url
+from data.fetcher import Fetcher, select_default_fetcher
+from data.incremental import SelectorCapture, in_context
+from data.parsers import get_parser, is_node
+from data.plan import ExtractionPlan
+from data.retry import FetchResult
+from data.scheduler import Scheduler
 
 warnings.filterwarnings("ignore", category=UserWarning, module="bs4")
 
-_q = partial(BeautifulSoup, features="html.parser")
+_q = parse_html
 
 
 def is_absoulte(url):
@@ -26,7 +34,7 @@ def with_metaclass(meta, base=object):
 
 
 def hash_html(html):
-    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+    return hashlib.sha256((html or "").encode("utf-8")).hexdigest()
 
 
 class BaseField(object):
@@ -73,7 +81,10 @@ class TextField(BaseField):
         """get value from query"""
         if not self.selector:
             return None
-        tag = q.select(self.selector)
+        return self.extract(q.select(self.selector))
+
+    def extract(self, tag):
+        """build the value from the tags matched by the selector"""
         mapped = map(lambda x: self.clean(x.text), tag)
         try:
             return next(mapped) if not self.repeated else list(mapped)
@@ -100,6 +111,9 @@ class AttributeValueField(TextField):
             tag = q.select(self.selector)
         else:
             tag = q
+        return self.extract(tag)
+
+    def extract(self, tag):
         if tag and self.attr:
             mapped = map(lambda x: x.get(self.attr), tag)
             return next(mapped) if not self.repeated else list(mapped)
@@ -115,10 +129,7 @@ class HtmlField(TextField):
         super(HtmlField, self).__init__(*args, **kwargs)
         self.repeated = repeated
 
-    def get_value(self, q):
-        if not self.selector:
-            return None
-        tag = q.select(self.selector)
+    def extract(self, tag):
         mapped = map(lambda x: self.clean(str(x)), tag)
         return next(mapped) if not self.repeated else list(mapped)
 
@@ -133,7 +144,9 @@ class RelationalField(TextField):
     def get_value(self, q):
         if not self.selector:
             return []
-        tag = q.select(self.selector)
+        return self.extract(q.select(self.selector))
+
+    def extract(self, tag):
         items = [self.item(item=t) for t in tag]
         return items
 
@@ -144,22 +157,50 @@ class DomObjectField(TextField):
     def __init__(self, **kwargs):
         super(DomObjectField, self).__init__(**kwargs)
 
+    @staticmethod
+    def to_element(node):
+        """BeautifulSoup tags convert directly, other parser backends
+        go through their markup"""
+        if isinstance(node, Tag):
+            return tag_to_element(node)
+        return parse(str(node))
+
     def get_value(self, q):
         if not self.selector:
             return []
-        tags = q.select(self.selector)
-        fields = map(lambda x: parse(str(x)), tags)
+        return self.extract(q.select(self.selector))
+
+    def extract(self, tags):
+        fields = map(self.to_element, tags)
         return next(fields) if not self.repeated else list(fields)
 
 
+class SubPageResults(list):
+    """Items of the sub pages fetched successfully, the sub pages that
+    failed are kept as FetchResults in 'failures'."""
+
+    def __init__(self, results=()):
+        results = list(results)
+        super(SubPageResults, self).__init__(r.value for r in results if r.ok)
+        self.failures = [r for r in results if not r.ok]
+
+
 class SubPageFields(object):
     """Get the resources from sub pages"""
 
     def __init__(self, item, **kwargs):
         self.item = item
         self.link_selector = kwargs.get("link_selector", None)
+        self.name = None
         super(SubPageFields, self).__init__()
 
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def _parser(self):
+        meta = getattr(self.item, "_meta", None)
+        return getattr(meta, "parser", get_parser()).parse
+
     def _build_url(self, instance, path):
         url = path
         if path and not is_absoulte(path):
@@ -170,24 +211,94 @@ class SubPageFields(object):
         """parse the repsonse to corotine"""
         url = self._build_url(instance, link)
         html = await instance._meta.fetcher.fetch(url)
-        sub_q = _q(html)
-        return self.item(item=sub_q)
+        document = Document(
+            html,
+            url,
+            parser=self._parser(),
+            metrics=instance._meta.metrics,
+        )
+        if isinstance(self.item, ItemMeta):
+            return await self.item.from_document(document)
+        return self.item(item=document)
 
-    async def __get__(self, instance, owner):
-        """overriding the descriptor to get the related links html"""
-        page_source = instance._q
+    async def _result(self, instance, link):
+        """fetch and parse a sub page into a FetchResult"""
+        try:
+            item = await self._parse_response(instance, link)
+        except Exception as exc:
+            return FetchResult(link, None, exc)
+        return FetchResult(link, item, None)
+
+    def links(self, instance):
+        """the linked pages, each distinct url once"""
         if not self.link_selector:
             return []
-        link_selectors = page_source.select(self.link_selector)
-        links = map(lambda x: x.get("href"), link_selectors)
-        routines = [self._parse_response(instance, link) for link in links]
-        results = await asyncio.gather(*routines, return_exceptions=True)
+        links, seen = [], set()
+        for tag in instance._q.select(self.link_selector):
+            link = tag.get("href")
+            url = self._build_url(instance, link)
+            if url:
+                url = normalize_url(url)
+            if url not in seen:
+                seen.add(url)
+                links.append(link)
+        return links
+
+    def _routines(self, instance):
+        return [self._result(instance, link) for link in self.links(instance)]
+
+    async def _gather(self, instance):
+        results = await asyncio.gather(*self._routines(instance))
+        return SubPageResults(results)
+
+    async def _memoized(self, instance):
+        """the results are gathered once per instance, concurrent and
+        later awaits share them"""
+        memo = instance.__dict__.setdefault("_subpages", {})
+        key = self.name or id(self)
+        task = memo.get(key)
+        if task is None or task.cancelled():
+            task = memo[key] = asyncio.ensure_future(self._gather(instance))
+        if task.done():
+            return task.result()
+        return await asyncio.shield(task)
+
+    async def stream(self, instance):
+        """yields a FetchResult per sub page in the order they complete"""
+        for future in asyncio.as_completed(self._routines(instance)):
+            yield await future
+
+    def resolve(self, instance, results):
+        """keep FetchResults gathered elsewhere as the results of the
+        field, awaiting it then fetches nothing"""
+        results = SubPageResults(results)
+        done = asyncio.get_event_loop().create_future()
+        done.set_result(results)
+        instance.__dict__.setdefault("_subpages", {})[
+            self.name or id(self)
+        ] = done
         return results
 
+    def __get__(self, instance, owner):
+        """overriding the descriptor to get the related links html"""
+        if instance is None:
+            return self
+        return self._memoized(instance)
+
     def __set__(self, obj, value):
         raise AttributeError("SubPageFields cannot be set.")
 
 
+def get_subpage_fields(item_class):
+    """get the sub page fields of a class and its bases"""
+    fields = {}
+    for klass in reversed(item_class.__mro__):
+        for name, obj in vars(klass).items():
+            if isinstance(obj, SubPageFields):
+                fields[name] = obj
+    return fields
+
+
 def get_fields(bases, attrs):
     """get fields from base classes"""
     fields = [
@@ -205,18 +316,74 @@ def get_fields(bases, attrs):
 class ItemOptions(object):
     """Meta options for an item."""
 
-    DATUM_VALUES = ("selector", "base_url", "fetcher")
+    DATUM_VALUES = (
+        "selector",
+        "base_url",
+        "fetcher",
+        "parser",
+        "next_selector",
+        "parse_workers",
+        "fingerprints",
+        "lazy",
+        "compact",
+    )
+    FETCHER_VALUES = (
+        "limit",
+        "limit_per_host",
+        "ttl_dns_cache",
+        "keepalive_timeout",
+        "desired_capabilities",
+        "driver_factory",
+        "pool_size",
+        "max_pages",
+        "max_workers",
+        "executor",
+        "concurrency",
+        "rate_limit",
+        "rate_burst",
+        "cache",
+        "cache_max_age",
+        "metrics",
+        "connect_timeout",
+        "read_timeout",
+        "timeout",
+        "retries",
+        "backoff",
+        "max_backoff",
+        "retry_statuses",
+        "breaker_threshold",
+        "breaker_reset",
+        "coalesce",
+        "block_resources",
+        "wait_for",
+        "wait_until",
+        "archive",
+        "latency",
+    )
 
     def __init__(self, meta):
         self.selector = getattr(meta, "selector", None)
         self.base_url = getattr(meta, "base_url", "")
+        self.parser = get_parser(getattr(meta, "parser", "html.parser"))
+        self.next_selector = getattr(meta, "next_selector", None)
+        self.parse_workers = getattr(meta, "parse_workers", None)
+        self.fingerprints = getattr(meta, "fingerprints", None)
+        self.lazy = getattr(meta, "lazy", False)
+        self.compact = getattr(meta, "compact", False)
         _fetcher = getattr(meta, "fetcher", select_default_fetcher())
-        self.fetcher = _fetcher()
         attrs = getattr(meta, "__dict__", {})
         self._qkwargs = {}
+        self._fetcher_kwargs = {}
         for attr, value in attrs.items():
-            if attr not in self.DATUM_VALUES and not attr.startswith("_"):
+            if attr in self.FETCHER_VALUES:
+                self._fetcher_kwargs[attr] = value
+            elif attr not in self.DATUM_VALUES and not attr.startswith("_"):
                 self._qkwargs[attr] = value
+        if isinstance(_fetcher, Fetcher):
+            self.fetcher = _fetcher
+        else:
+            self.fetcher = _fetcher(**self._fetcher_kwargs)
+        self.metrics = getattr(meta, "metrics", None)
 
 
 class ItemMeta(type):
@@ -226,9 +393,128 @@ class ItemMeta(type):
         attrs["_fields"] = get_fields(bases, attrs)
         new_class = super(ItemMeta, mcs).__new__(mcs, name, bases, attrs)
         new_class._meta = ItemOptions(getattr(new_class, "Meta", None))
+        new_class._plan = ExtractionPlan(new_class)
+        new_class._subpage_fields = get_subpage_fields(new_class)
+        new_class._record = record_class(new_class)
+        if new_class._meta.lazy:
+            for field_name in new_class._fields:
+                setattr(new_class, field_name, LazyValue(field_name))
         return new_class
 
 
+class LazyValue(object):
+    """Field of a lazy item, extracted on first access and then kept in
+    the instance dict which takes precedence over this descriptor."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return owner._fields[self.name]
+        value = instance._plan.extract_field(
+            instance, self.name, instance._q, instance._matches
+        )
+        instance.__dict__[self.name] = value
+        return value
+
+
+class LazyValues(object):
+    """The values of a lazy item, forcing every field not read yet."""
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = {name: getattr(instance, name) for name in owner._fields}
+        instance.__dict__["values"] = values
+        instance._matches = None
+        return values
+
+
+class Record(object):
+    """Slotted values of an item, detached from the parsed tree.
+
+    Record classes are generated per item class with a slot per field,
+    so a record holds no instance dict, no duplicate 'values' dict and
+    no reference to the document it was extracted from.
+    """
+
+    __slots__ = ()
+    _item = None
+
+    def __init__(self, *args):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_item(cls, item):
+        values = item.values
+        return cls(*(_compact(values[name]) for name in cls.__slots__))
+
+    @property
+    def values(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def json(self):
+        return self.values
+
+    @property
+    def fingerprint(self):
+        return Item.fingerprint.fget(self)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values == other.values
+
+    def __repr__(self):
+        return "<{} {!r}>".format(type(self).__name__, self.values)
+
+    def __reduce__(self):
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        return _unpickle_record, (self._item, values)
+
+
+def _unpickle_record(item_class, values):
+    return item_class._record(*values)
+
+
+def record_class(item_class):
+    """the Record class holding the fields of item_class"""
+    return type(
+        item_class.__name__ + "Record",
+        (Record,),
+        {
+            "__slots__": tuple(item_class._fields),
+            "__module__": item_class.__module__,
+            "_item": item_class,
+        },
+    )
+
+
+def _compact(value):
+    if isinstance(value, Item):
+        return value._record.from_item(value)
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def to_record(value):
+    """plain python value of an item, nested items become dicts"""
+    if isinstance(value, (Item, Record)):
+        return {name: to_record(v) for name, v in value.values.items()}
+    if isinstance(value, list):
+        return [to_record(v) for v in value]
+    return value
+
+
+def _detach(value):
+    if isinstance(value, Item):
+        return value.detach()
+    if isinstance(value, list):
+        return [_detach(v) for v in value]
+    return value
+
+
 class ItemDoesNotExist(Exception):
     """Item not found"""
 
@@ -238,62 +524,312 @@ class ItemDoesNotExist(Exception):
 class Item(with_metaclass(ItemMeta)):
     """Base class for any demiurge item."""
 
-    def __init__(self, item=None):
-        self.values = {}
-        if isinstance(item, Tag):
+    values = LazyValues()
+
+    def __init__(self, item=None, document=None):
+        if isinstance(item, str):
+            item = Document(item, parser=self._meta.parser.parse)
+        if isinstance(item, Document):
+            self._document = item
+            self._q = item.tree
+        elif is_node(item):
+            self._document = document
             self._q = item
-        elif isinstance(item, str):
-            self._q = _q(item)
         else:
             raise ValueError(
-                "Invalid object given to Item (Expecting String or Tag)"
+                "Invalid object given to Item "
+                "(Expecting String, Document or Tag)"
             )
-        for field_name, field in self._fields.items():
-            value = field.get_value(self._q)
-            clean_field = getattr(self, "clean_%s" % field_name, None)
-            if clean_field:
-                value = clean_field(value)
-            value = field.coerce(value)
-            setattr(self, field_name, value)
-            self.values[field_name] = value
+        if self._meta.lazy:
+            self._matches = {}
+            return
+        self.values = self._plan.extract(self, self._q)
+        self.__dict__.update(self.values)
 
     def json(self):
         return self.values
 
     @property
     def md5hash(self):
-        return hash_html(self._q.html)
+        """md5 of the markup the item was extracted from"""
+        if self._q is None:
+            return None
+        return hashlib.md5(str(self._q).encode("utf-8")).hexdigest()
+
+    @property
+    def fingerprint(self):
+        """hash of the extracted values, equal for equal items"""
+        record = json.dumps(to_record(self), sort_keys=True, default=str)
+        return hashlib.sha1(record.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def close(cls):
+        """close the fetcher shared by this item and its sub pages"""
+        await cls._meta.fetcher.close()
 
     @classmethod
-    async def _get_items(cls, **kwargs):
+    def from_values(cls, values):
+        """Build an item from extracted values, detached from any tree."""
+        item = cls.__new__(cls)
+        item._q = None
+        item._document = None
+        item.values = values
+        item.__dict__.update(values)
+        return item
+
+    def detach(self):
+        """Copy of the item holding only its values, nested items are
+        detached as well."""
+        values = {name: _detach(value) for name, value in self.values.items()}
+        return type(self).from_values(values)
+
+    @classmethod
+    async def _get_document(cls, **kwargs):
         url = kwargs.pop("url")
         html = await cls._meta.fetcher.fetch(url, **kwargs)
+        return Document(
+            html,
+            url,
+            parser=cls._meta.parser.parse,
+            metrics=cls._meta.metrics,
+        )
+
+    @classmethod
+    def _select(cls, document):
         if cls._meta.selector:
-            items = _q(html).select(cls._meta.selector)
-        else:
-            items = [_q(html)]
+            return document.select(cls._meta.selector)
+        return [document]
+
+    @classmethod
+    def _unchanged(cls, document):
+        """whether Meta.fingerprints recorded the same page content"""
+        store = cls._meta.fingerprints
+        if store is None or not document.url:
+            return False
+        return not store.page_changed(
+            cls.__qualname__, document.url, hash_html(document.html)
+        )
+
+    @classmethod
+    def _changed(cls, document, items):
+        """yields the items the last crawl of the page did not have. The
+        page is recorded in Meta.fingerprints once every item went
+        through, so a failed extraction is not taken as a crawl."""
+        store = cls._meta.fingerprints
+        if store is None or not document.url:
+            yield from items
+            return
+        name = cls.__qualname__
+        previous = store.previous_items(name, document.url)
+        fingerprints = []
+        for item in items:
+            fingerprints.append(item.fingerprint)
+            if store.item_changed(previous, item.fingerprint):
+                yield item
+        store.crawled(
+            name, document.url, hash_html(document.html), fingerprints
+        )
+
+    @classmethod
+    def _finish(cls, items):
+        """the items as returned to callers, records with Meta.compact"""
+        if cls._meta.compact:
+            return [cls._record.from_item(item) for item in items]
         return items
 
+    @classmethod
+    async def _build(cls, document, whole=False, incremental=True):
+        """extract the items of a document, in the parse pool when
+        Meta.parse_workers is set and the item can be offloaded. With
+        Meta.fingerprints set and 'incremental', unchanged pages and
+        items are skipped."""
+        incremental = incremental and not whole
+        if incremental and cls._unchanged(document):
+            return []
+        items = None
+        if cls._meta.parse_workers:
+            items = await offload.extract(cls, document, whole=whole)
+        if items is None:
+            nodes = [document] if whole else cls._select(document)
+            items = [cls(item=i, document=document) for i in nodes]
+        if incremental:
+            items = list(cls._changed(document, items))
+        return cls._finish(items)
+
+    @classmethod
+    async def from_document(cls, document):
+        """Build one item from a whole document."""
+        items = await cls._build(document, whole=True)
+        return items[0]
+
     @classmethod
     async def all_from(cls, **kwargs):
         """Query for items passing args explicitly."""
-        pq_items = await cls._get_items(**kwargs)
-        return [cls(item=i) for i in pq_items]
+        document = await cls._get_document(**kwargs)
+        return await cls._build(document)
+
+    @classmethod
+    async def stream_from(cls, **kwargs):
+        """Yield items one by one passing args explicitly."""
+        document = await cls._get_document(**kwargs)
+        if cls._meta.parse_workers:
+            for item in await cls._build(document):
+                yield item
+            return
+        if cls._unchanged(document):
+            return
+        items = (cls(item=i, document=document) for i in cls._select(document))
+        for item in cls._changed(document, items):
+            yield cls._finish([item])[0]
 
     @classmethod
     async def one(cls, path="", index=0):
-        """Return ocurrence (the first one, unless specified) of the item."""
+        """Return ocurrence (the first one, unless specified) of the item,
+        built like the results of all. Meta.fingerprints does not apply,
+        the item is returned whether the page changed or not."""
         url = urljoin(cls._meta.base_url, path)
-        pq_items = await cls._get_items(url=url, **cls._meta._qkwargs)
-        item = pq_items[index]
-        if not item:
+        document = await cls._get_document(url=url, **cls._meta._qkwargs)
+        items = await cls._build(document, incremental=False)
+        try:
+            return items[index]
+        except IndexError:
             raise ItemDoesNotExist("%s not found" % cls.__name__)
-        return cls(item=item)
 
     @classmethod
     async def all(cls, path="", **kwargs):
         """Return all ocurrences of the item."""
         url = urljoin(cls._meta.base_url, path)
         kwargs.update(cls._meta._qkwargs)
-        pq_items = await cls._get_items(url=url, **kwargs)
-        return [cls(item=i) for i in pq_items]
+        return await cls.all_from(url=url, **kwargs)
+
+    @classmethod
+    async def stream(cls, path="", **kwargs):
+        """Yield every ocurrence of the item as soon as it is extracted."""
+        url = urljoin(cls._meta.base_url, path)
+        kwargs.update(cls._meta._qkwargs)
+        async for item in cls.stream_from(url=url, **kwargs):
+            yield item
+
+    @classmethod
+    async def _page_result(cls, path):
+        """the items of one page as a FetchResult"""
+        url = path
+        try:
+            url = urljoin(cls._meta.base_url, path)
+            document = await cls._get_document(url=url, **cls._meta._qkwargs)
+            return FetchResult(url, await cls._build(document), None)
+        except Exception as exc:
+            return FetchResult(url, None, exc)
+
+    @classmethod
+    async def _many(cls, paths, concurrency):
+        """yields (index, FetchResult) of every path, 'concurrency'
+        pages are fetched at once"""
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if hasattr(paths, "__len__"):
+            concurrency = max(1, min(concurrency, len(paths)))
+        paths = enumerate(paths)
+        results = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def worker():
+            for index, path in paths:
+                await results.put((index, await cls._page_result(path)))
+            await results.put(done)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            finished = 0
+            while finished < concurrency:
+                result = await results.get()
+                if result is done:
+                    finished += 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    @classmethod
+    async def many(cls, paths, concurrency=10):
+        """Return a FetchResult with the items of every path, in the
+        order of paths. A failed page carries its error instead of
+        aborting the batch."""
+        results = {}
+        async for index, result in cls._many(paths, concurrency):
+            results[index] = result
+        return [results[index] for index in range(len(results))]
+
+    @classmethod
+    async def stream_many(cls, paths, concurrency=10):
+        """Yield a FetchResult with the items of every path as soon as
+        its page completes."""
+        async for _, result in cls._many(paths, concurrency):
+            yield result
+
+    @classmethod
+    async def resolve(cls, path="", workers=8, max_depth=None, **kwargs):
+        """Return all ocurrences of the item with the sub pages of the
+        whole item graph fetched, see Scheduler."""
+        items = await cls.all(path, **kwargs)
+        return await Scheduler(workers, max_depth).resolve(items)
+
+    @classmethod
+    async def iterparse(cls, path="", chunk_size=65536):
+        """Yield every ocurrence of the item while the page downloads.
+
+        Meta.selector must be a simple selector, see SimpleSelector;
+        the markup of each match is parsed on its own as soon as it
+        is complete and the rest of the page is never kept."""
+        if not cls._meta.selector:
+            raise ValueError("iterparse needs Meta.selector")
+        url = urljoin(cls._meta.base_url, path)
+        capture = SelectorCapture(cls._meta.selector)
+        chunks = cls._meta.fetcher.stream(
+            url, chunk_size=chunk_size, **cls._meta._qkwargs
+        )
+        async for chunk in chunks:
+            capture.feed(chunk)
+            for markup in capture.pop():
+                yield cls._from_markup(markup, url)
+        capture.close()
+        for markup in capture.pop():
+            yield cls._from_markup(markup, url)
+
+    @classmethod
+    def _from_markup(cls, markup, url):
+        document = Document(
+            in_context(markup),
+            url,
+            parser=cls._meta.parser.parse,
+            metrics=cls._meta.metrics,
+        )
+        nodes = cls._select(document)
+        if not nodes:
+            raise ValueError(
+                "{} parsed the markup matched by {!r} into no match, "
+                "{!r}".format(
+                    cls._meta.parser.name, cls._meta.selector, markup[:200]
+                )
+            )
+        item = cls(item=nodes[0], document=document)
+        return cls._finish([item])[0]
+
+    @classmethod
+    def crawl(cls, path="", crawler=None, **kwargs):
+        """Yield the items of path and of every next page reached from
+        it, see Crawler for the options. Pages which failed are kept in
+        the 'errors' of the crawler, pass a Crawler to read them."""
+        if crawler is None:
+            crawler = Crawler(cls, **kwargs)
+        elif kwargs:
+            raise TypeError("Crawler options are given to the crawler")
+        return crawler.crawl(path)
+
+    async def stream_subpages(self, name):
+        """Yield a FetchResult per page of the named SubPageFields as
+        the pages complete."""
+        async for item in getattr(type(self), name).stream(self):
+            yield item
@@ -0,0 +1,170 @@
+"""distributed crawls: workers consuming a shared work queue
+
+    dataland-worker crawl.db --submit myproject.items:Product / --workers 4
+
+Tasks name the item class by import path and the url to extract it
+from. Workers fetch and extract the page, store the records of the
+items as results and queue the next pages linked by
+Meta.next_selector. Every process or host pointed at the same queue
+shares the work, each url is crawled once.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+
+from data.crawler import Crawler
+from data.data import to_record
+from data.offload import item_path, load_item
+from data.requests import normalize_url
+from data.workqueue import SQLiteQueue
+
+
+def submit(queue, item_class, path=""):
+    """queue the crawl of item_class from path, relative to its
+    base_url. Returns False when the url was queued before."""
+    item = item_path(item_class)
+    if item is None:
+        raise ValueError(
+            "{} cannot be imported by workers, define it at module "
+            "level".format(item_class.__name__)
+        )
+    return queue.push(item, normalize_url(path, item_class._meta.base_url))
+
+
+class Worker(object):
+    """Consumes tasks of 'queue' with 'concurrency' tasks at once.
+
+    Next pages are queued when 'follow' is set and the page is less
+    than 'max_depth' links away from the submitted url. The worker
+    stops once the queue has nothing queued or leased left.
+    """
+
+    def __init__(
+        self, queue, concurrency=4, follow=True, max_depth=None, idle=0.5
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.follow = follow
+        self.max_depth = max_depth
+        self.idle = idle
+        self.done = 0
+        self.failed = 0
+        self._items = {}
+
+    def item(self, path):
+        if path not in self._items:
+            self._items[path] = load_item(path)
+        return self._items[path]
+
+    async def _call(self, method, *args):
+        """runs a queue operation on the executor, so waiting for the
+        locks of other workers does not stall the fetches of this one"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, method, *args)
+
+    async def process(self, task):
+        """crawl the page of one task"""
+        try:
+            item = self.item(task.item)
+            document = await item._get_document(
+                url=task.url, **item._meta._qkwargs
+            )
+            records = [to_record(r) for r in await item._build(document)]
+            if self.follow and (
+                self.max_depth is None or task.depth < self.max_depth
+            ):
+                for link in Crawler(item).next_links(document):
+                    await self._call(
+                        self.queue.push, task.item, link, task.depth + 1
+                    )
+        except Exception as exc:
+            await self._call(self.queue.fail, task, repr(exc))
+            self.failed += 1
+        else:
+            if await self._call(self.queue.ack, task, records):
+                self.done += 1
+
+    async def _consume(self):
+        while True:
+            task = await self._call(self.queue.pop)
+            if task is None:
+                if not await self._call(self.queue.pending):
+                    return
+                await asyncio.sleep(self.idle)
+                continue
+            await self.process(task)
+
+    async def run(self):
+        """consume until the queue is drained"""
+        try:
+            await asyncio.gather(
+                *(self._consume() for _ in range(self.concurrency))
+            )
+        finally:
+            for item in self._items.values():
+                await item.close()
+        return self
+
+
+def work(path, concurrency=4, follow=True, max_depth=None):
+    """runs a worker on its own event loop, the target of worker
+    processes"""
+    queue = SQLiteQueue(path)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        worker = Worker(queue, concurrency, follow, max_depth)
+        loop.run_until_complete(worker.run())
+        return worker.done, worker.failed
+    finally:
+        loop.close()
+        queue.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="run distributed crawl workers on a queue"
+    )
+    parser.add_argument("queue", help="path of the sqlite queue")
+    parser.add_argument(
+        "--submit",
+        nargs="+",
+        metavar=("ITEM", "PATH"),
+        help="queue the item class 'module:Class' from the given paths",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--no-follow", action="store_true")
+    parser.add_argument("--results", help="write the results as json lines")
+    args = parser.parse_args(argv)
+
+    queue = SQLiteQueue(args.queue)
+    if args.submit:
+        item_class = load_item(args.submit[0])
+        for path in args.submit[1:] or [""]:
+            submit(queue, item_class, path)
+
+    options = (args.concurrency, not args.no_follow, args.max_depth)
+    processes = [
+        multiprocessing.Process(target=work, args=(args.queue,) + options)
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    if args.results:
+        with open(args.results, "w") as output:
+            for _, item, record in queue.results():
+                output.write(json.dumps({"item": item, "record": record}))
+                output.write("\n")
+    print(json.dumps(queue.stats()))
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""parsed documents shared by items and fields"""
+
+import time
+from functools import partial
+from bs4 import BeautifulSoup
+from bs4.element import CData, PreformattedString, Tag
+from untangle import Element
+
+parse_html = partial(BeautifulSoup, features="html.parser")
+
+
+class Document(object):
+    """A fetched page, parsed once.
+
+    The tree is built on first access and shared by every item and
+    field extracted from the page. Selections on the whole document are
+    memoized per selector.
+    """
+
+    def __init__(
+        self, html="", url=None, tree=None, parser=parse_html, metrics=None
+    ):
+        self.html = html
+        self.url = url
+        self._tree = tree
+        self._parser = parser
+        self._metrics = metrics
+        self._selections = {}
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            start = time.perf_counter()
+            self._tree = self._parser(self.html)
+            if self._metrics is not None:
+                self._metrics.parsed(
+                    self.url, len(self.html or ""), time.perf_counter() - start
+                )
+        return self._tree
+
+    def select(self, selector):
+        """select from the whole document, the returned list is shared
+        between callers and must not be modified"""
+        if selector not in self._selections:
+            self._selections[selector] = self.tree.select(selector)
+        return self._selections[selector]
+
+    def __str__(self):
+        return self.html
+
+
+def _element_name(name):
+    """mirror the name mangling of untangle"""
+    return name.replace("-", "_").replace(".", "_").replace(":", "_")
+
+
+def _build_element(tag):
+    attrs = {
+        key: " ".join(value) if isinstance(value, list) else value
+        for key, value in tag.attrs.items()
+    }
+    element = Element(_element_name(tag.name), attrs)
+    for child in tag.children:
+        if isinstance(child, Tag):
+            element.add_child(_build_element(child))
+        elif isinstance(child, CData) or not isinstance(
+            child, PreformattedString
+        ):
+            element.add_cdata(str(child))
+    return element
+
+
+def tag_to_element(tag):
+    """build the untangle object of a tag straight from the parsed
+    tree, the same structure untangle.parse gives for its markup"""
+    root = Element(None, None)
+    root.is_root = True
+    root.add_child(_build_element(tag))
+    return root
@@ -3,9 +3,30 @@ import inspect
 import warnings
 import random
 import shutil
-from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-from data.requests import url_concat, urlfetch
+from data.archive import Archive
+from data.browser import BLOCKED_RESOURCES, PlaywrightBrowser
+from data.cache import CacheEntry
+from data.limiter import Limiter
+from data.pool import DriverPool
+from data.requests import (
+    Response,
+    create_session,
+    fetch_response,
+    normalize_url,
+    stream_body,
+    url_concat,
+)
+from data.retry import (
+    TRANSIENT_STATUSES,
+    CircuitBreaker,
+    FetchError,
+    FetchResult,
+    RetryPolicy,
+)
 from selenium import webdriver
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium.webdriver.common.proxy import Proxy, ProxyType
@@ -18,69 +39,337 @@ class Fetcher(object):
     all the intermidiate actions can be completed
     with in fetcher"""
 
-    async def fetch(self, url, params={}, loop=None, max_workers=5, **extra):
-        """fetches the result from fetcher and gives it"""
+    executor_class = ProcessPoolExecutor
+    EXECUTORS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+    def __init__(
+        self,
+        *args,
+        max_workers=5,
+        executor=None,
+        concurrency=None,
+        rate_limit=None,
+        rate_burst=1,
+        cache=None,
+        cache_max_age=0,
+        metrics=None,
+        timeout=None,
+        retries=0,
+        backoff=0.5,
+        max_backoff=30,
+        retry_statuses=TRANSIENT_STATUSES,
+        breaker_threshold=None,
+        breaker_reset=30,
+        coalesce=True,
+        **kwargs
+    ):
+        if isinstance(executor, str):
+            executor = self.EXECUTORS[executor]
+        self.executor_class = executor or self.executor_class
+        self.max_workers = max_workers
+        self._executor = None
+        self.limiter = Limiter(concurrency, rate_limit, rate_burst)
+        self.cache = cache
+        self.cache_max_age = cache_max_age
+        self.metrics = metrics
+        self.timeout = timeout
+        self.retry = RetryPolicy(retries, backoff, max_backoff, retry_statuses)
+        self.breaker = None
+        if breaker_threshold:
+            self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.coalesce = coalesce
+        self._in_flight = {}
+        super(Fetcher, self).__init__()
+
+    def get_executor(self):
+        """returns the executor running blocking on_fetch
+        implementations, created on first use and kept until close"""
+        if self._executor is None:
+            self._executor = self.executor_class(self.max_workers)
+        return self._executor
+
+    async def fetch(
+        self, url, params={}, loop=None, max_workers=None, **extra
+    ):
+        """fetches the result from fetcher and gives it.
+        'max_workers' is kept for compatibility, the executor is sized
+        by the fetcher itself. Concurrent GET requests of the same
+        normalized url share a single request unless Meta.coalesce is
+        False."""
 
-        result = {}
-        pool = ProcessPoolExecutor(max_workers)
         extra.update({"loop": loop})
         parsed_url = url_concat(url, **params)
+        key = self._coalesce_key(parsed_url, extra)
+        if key is None:
+            return await self._fetch(parsed_url, extra, loop)
+        shared = self._in_flight.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._fetch(parsed_url, extra, loop))
+            shared = self._in_flight[key] = [task, 0]
+            task.add_done_callback(lambda done: self._landed(key, done))
+        task = shared[0]
+        shared[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            shared[1] -= 1
+            # the request is dropped once every waiter is cancelled
+            if not shared[1] and not task.done():
+                task.cancel()
+
+    @staticmethod
+    def _is_plain_get(extra):
+        """GET requests without a payload, the only ones which can be
+        cached or coalesced"""
+        if extra.get("payload"):
+            return False
+        return extra.get("method", "GET").upper() == "GET"
+
+    def _coalesce_key(self, url, extra):
+        """key shared by requests which can be coalesced, or None"""
+        if not self.coalesce or not self._is_plain_get(extra):
+            return None
+        headers = extra.get("headers") or {}
+        return (
+            id(asyncio.get_event_loop()),
+            normalize_url(url),
+            tuple(sorted(headers.items())),
+        )
+
+    def _landed(self, key, task):
+        shared = self._in_flight.get(key)
+        if shared is not None and shared[0] is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # every waiter may be gone, retrieve the error for them
+            task.exception()
+
+    async def _fetch(self, parsed_url, extra, loop=None):
+        """cache lookup and retries around the attempts of a fetch"""
+        result = {}
+        cached = None
+        cacheable = self.cache is not None and self._is_plain_get(extra)
+        if cacheable:
+            cached = self.cache.get(parsed_url)
+            if cached is not None:
+                if cached.is_fresh(self.cache_max_age):
+                    self.cache.stats.hit(cached)
+                    return cached.body
+                headers = dict(extra.get("headers") or {})
+                headers.update(cached.validators())
+                extra["headers"] = headers
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(parsed_url, extra, loop)
+                break
+            except Exception as exc:
+                if not self.retry.should_retry(exc, attempt):
+                    raise
+                if self.metrics is not None:
+                    self.metrics.retried(parsed_url, attempt + 1, exc)
+                await asyncio.sleep(self.retry.delay(attempt))
+                attempt += 1
+        return self._cache_result(parsed_url, cached, result, cacheable)
+
+    async def stream(self, url, params={}, chunk_size=65536, **extra):
+        """yields the body of url in chunks as it downloads. Fetchers
+        which cannot stream yield the whole body of fetch at once."""
+        yield await self.fetch(url, params=params, **extra)
+
+    async def fetch_result(self, url, **kwargs):
+        """fetches like fetch but returns a FetchResult instead of
+        raising"""
+        try:
+            return FetchResult(url, await self.fetch(url, **kwargs), None)
+        except Exception as exc:
+            return FetchResult(url, None, exc)
+
+    async def _attempt(self, url, extra, loop=None):
+        """one try of the fetch, guarded by the circuit breaker. An
+        answer with a transient status raises FetchError, whether it is
+        retried or not, and counts as a failure of the host."""
+        if self.breaker is not None:
+            self.breaker.check(url)
+        try:
+            async with self.limiter.limit(url):
+                call = (
+                    self._call if self.metrics is None else self._traced_call
+                )
+                result = await call(url, extra, loop)
+            if (
+                isinstance(result, Response)
+                and result.status in self.retry.statuses
+            ):
+                raise FetchError(url, result.status)
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.failure(url)
+            raise
+        if self.breaker is not None:
+            self.breaker.success(url)
+        return result
+
+    async def _call(self, url, extra, loop=None):
+        """runs on_fetch within the timeout, blocking implementations on
+        the executor"""
         if inspect.iscoroutinefunction(self.on_fetch):
-            result = await self.on_fetch(parsed_url, extra)
+            call = self.on_fetch(url, extra)
         else:
             loop = loop or asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                pool, self.on_fetch, parsed_url, extra
+            call = loop.run_in_executor(
+                self.get_executor(), self.on_fetch, url, extra
+            )
+        if self.timeout is not None:
+            call = asyncio.wait_for(call, self.timeout)
+        return await call
+
+    async def _traced_call(self, url, extra, loop=None):
+        """runs on_fetch reporting its timings to the metrics, timeouts
+        and cancellations are reported as failures"""
+        timings = extra["trace"] = {}
+        self.metrics.request_started()
+        start = time.monotonic()
+        try:
+            result = await self._call(url, extra, loop)
+        except (Exception, asyncio.CancelledError) as exc:
+            self.metrics.request_failed(url, exc)
+            raise
+        else:
+            status, body = None, result
+            if isinstance(result, Response):
+                status, body = result.status, result.body
+            self.metrics.request_finished(
+                url,
+                time.monotonic() - start,
+                status=status,
+                size=len(body or ""),
+                dns=timings.get("dns"),
+                connect=timings.get("connect"),
+                ttfb=timings.get("ttfb"),
             )
+        finally:
+            self.metrics.request_ended()
+        return result
+
+    def _cache_result(self, url, cached, result, cacheable=True):
+        """unwraps responses and stores cacheable ones in the cache, a
+        304 answer is served from the cached entry"""
+        status, headers = 200, None
+        if isinstance(result, Response):
+            if result.status == 304 and cached is not None:
+                self.cache.stats.hit(cached, revalidated=True)
+                self.cache.touch(url, cached)
+                return cached.body
+            status, headers = result.status, result.headers
+            result = result.body
+        if self.cache is not None and cacheable:
+            self.cache.stats.miss()
+            if status == 200:
+                self.cache.set(url, CacheEntry.from_response(result, headers))
         return result
 
     async def on_fetch(self, url, extra):
         """on_fetch base impl"""
         raise NotImplementedError
 
+    async def close(self):
+        """release the resources held by the fetcher"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
 
 class PhatomJSFetcher(Fetcher):
-    """PhatomJS based fetching"""
+    """PhatomJS based fetching over a pool of warm drivers"""
 
-    def __init__(self, *args, **kwargs):
+    executor_class = ThreadPoolExecutor
+
+    def __init__(
+        self, *args, driver_factory=None, pool_size=2, max_pages=100, **kwargs
+    ):
         dcap = dict(DesiredCapabilities.PHANTOMJS)
         dcap[
             "phantomjs.page.settings.userAgent"
         ] = "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/37.0.2062.120 Safari/537.36"
         self.desired_capabilities = kwargs.get("desired_capabilities", dcap)
+        self.driver_factory = driver_factory or webdriver.PhantomJS
+        self.pool_size = pool_size
+        self.max_pages = max_pages
+        self.pool = self.create_pool()
         super(PhatomJSFetcher, self).__init__(*args, **kwargs)
 
+    def create_driver(self, **kwargs):
+        """boots a new driver"""
+        return self.driver_factory(
+            desired_capabilities=self.desired_capabilities, **kwargs
+        )
+
+    def create_pool(self, **kwargs):
+        """creates a driver pool, kwargs are passed to every driver"""
+        return DriverPool(
+            lambda: self.create_driver(**kwargs),
+            size=self.pool_size,
+            max_pages=self.max_pages,
+        )
+
+    def render(self, pool, url):
+        """loads the url on a pooled driver"""
+        with pool.driver() as driver:
+            driver.get(url)
+            return driver.page_source
+
     def on_fetch(self, url, extra):
         """on fetch callback for phatomjs"""
-        driver = webdriver.PhantomJS(
-            desired_capabilities=self.desired_capabilities
-        )
-        driver.get(url)
-        return driver.page_source
+        return self.render(self.pool, url)
+
+    async def close(self):
+        """quits the pooled drivers"""
+        self.pool.close()
+        await super(PhatomJSFetcher, self).close()
 
 
 class PhantomProxyFetcher(PhatomJSFetcher):
     """proxy based fetching for phantomjs"""
 
     def __init__(self, *args, **kwargs):
-        self.service_args = None
+        self._pools = {}
+        self._pools_lock = threading.Lock()
         super(PhantomProxyFetcher, self).__init__(*args, **kwargs)
 
+    def get_pool(self, proxy=None):
+        """drivers are bound to their proxy, so keep a pool per proxy"""
+        if proxy is None:
+            return self.pool
+        with self._pools_lock:
+            if proxy not in self._pools:
+                self._pools[proxy] = self.create_pool(
+                    service_args=[
+                        "--proxy={}".format(proxy),
+                        "--proxy-type=https",
+                    ]
+                )
+            return self._pools[proxy]
+
     def on_fetch(self, url, extra):
         """on fetch callback for phatomjs"""
         proxy_list = extra.get("proxy_list")
-        if proxy_list:
-            proxy = self.get_proxy(proxy_list)
-            self.service_args = [
-                "--proxy={}".format(proxy),
-                "--proxy-type=https",
-            ]
-        driver = webdriver.PhantomJS(
-            desired_capabilities=self.desired_capabilities,
-            service_args=self.service_args,
-        )
-        driver.get(url)
-        return driver.page_source
+        proxy = self.get_proxy(proxy_list) if proxy_list else None
+        return self.render(self.get_pool(proxy), url)
+
+    async def close(self):
+        """quits the drivers of every proxy"""
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+        await super(PhantomProxyFetcher, self).close()
 
     @classmethod
     def get_proxy(cls, proxy_servers):
@@ -89,12 +378,242 @@ class PhantomProxyFetcher(PhatomJSFetcher):
         return "https://{}".format(server)
 
 
+class BrowserFetcher(Fetcher):
+    """Renders pages in the tabs of one headless browser.
+
+    The browser is launched by the async 'driver_factory' on first use
+    and up to 'pool_size' tabs render concurrently. Tabs are reused for
+    'max_pages' pages, requests for 'block_resources' types are aborted
+    and rendering waits for 'wait_until' and the 'wait_for' selector.
+    """
+
+    def __init__(
+        self,
+        *args,
+        driver_factory=None,
+        pool_size=4,
+        max_pages=100,
+        block_resources=BLOCKED_RESOURCES,
+        wait_for=None,
+        wait_until="load",
+        **kwargs
+    ):
+        self.driver_factory = driver_factory or PlaywrightBrowser.launch
+        self.pool_size = pool_size
+        self.max_pages = max_pages
+        self.block_resources = tuple(block_resources or ())
+        self.wait_for = wait_for
+        self.wait_until = wait_until
+        self._browser = None
+        self._loop = None
+        self._idle = []
+        self._pages = {}
+        self._slots = None
+        super(BrowserFetcher, self).__init__(*args, **kwargs)
+
+    def _bind(self):
+        """tabs and the browser are bound to the event loop using them"""
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._browser = None
+            self._idle = []
+            self._pages = {}
+            self._slots = asyncio.Semaphore(self.pool_size)
+
+    async def get_browser(self):
+        """returns the browser, launching it once on first use"""
+        self._bind()
+        if self._browser is None:
+            self._browser = asyncio.ensure_future(self.driver_factory())
+        try:
+            return await asyncio.shield(self._browser)
+        except Exception:
+            self._browser = None
+            raise
+
+    async def _checkout(self):
+        if self._idle:
+            return self._idle.pop()
+        browser = await self.get_browser()
+        tab = await browser.new_tab(self.block_resources)
+        self._pages[id(tab)] = 0
+        return tab
+
+    async def _checkin(self, tab, broken=False):
+        pages = self._pages.get(id(tab), 0) + 1
+        self._pages[id(tab)] = pages
+        if broken or pages >= self.max_pages:
+            self._pages.pop(id(tab), None)
+            try:
+                await tab.close()
+            except Exception:
+                pass
+        else:
+            self._idle.append(tab)
+
+    async def render(self, url):
+        """renders the url in a pooled tab"""
+        self._bind()
+        async with self._slots:
+            tab = await self._checkout()
+            broken = True
+            try:
+                html = await tab.render(
+                    url, wait_for=self.wait_for, wait_until=self.wait_until
+                )
+                broken = False
+                return html
+            finally:
+                await self._checkin(tab, broken)
+
+    async def on_fetch(self, url, extra):
+        return await self.render(url)
+
+    async def close(self):
+        """closes the idle tabs and the browser"""
+        tabs, self._idle = self._idle, []
+        for tab in tabs:
+            await tab.close()
+        launching, self._browser = self._browser, None
+        if launching is not None:
+            try:
+                browser = await launching
+            except Exception:
+                browser = None
+            if browser is not None:
+                await browser.close()
+        await super(BrowserFetcher, self).close()
+
+
 class UrlFetcher(Fetcher):
+    """aiohttp based fetching over a long lived pooled session"""
+
+    def __init__(
+        self,
+        *args,
+        limit=100,
+        limit_per_host=10,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+        connect_timeout=None,
+        read_timeout=None,
+        **kwargs
+    ):
+        self.session_options = {
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "ttl_dns_cache": ttl_dns_cache,
+            "keepalive_timeout": keepalive_timeout,
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+        }
+        self._session = None
+        self._session_loop = None
+        super(UrlFetcher, self).__init__(*args, **kwargs)
+
+    def get_session(self, loop=None):
+        """returns the shared session, opening it on first use.
+        A session is bound to its event loop so a new one is opened
+        when the fetcher is used from another loop."""
+        loop = loop or asyncio.get_event_loop()
+        session = self._session
+        if session is None or session.closed or self._session_loop is not loop:
+            trace_configs = None
+            if self.metrics is not None:
+                trace_configs = [self.metrics.trace_config()]
+            session = create_session(
+                loop=loop, trace_configs=trace_configs, **self.session_options
+            )
+            self._session = session
+            self._session_loop = loop
+        return session
+
     async def on_fetch(self, url, extra):
         """on data fetch using aiohttp"""
-        result = await urlfetch(url, **extra)
+        session = self.get_session(extra.pop("loop", None))
+        result = await fetch_response(url, session=session, **extra)
+        return result
+
+    async def stream(self, url, params={}, chunk_size=65536, **extra):
+        """yields the body of url in chunks read from the shared session
+        as they arrive, within the limits of the fetcher. Streams are
+        not cached nor retried."""
+        url = url_concat(url, **params)
+        session = self.get_session(extra.get("loop"))
+        async with self.limiter.limit(url):
+            async for chunk in stream_body(
+                url, session, extra.get("headers"), chunk_size=chunk_size
+            ):
+                yield chunk
+
+    async def close(self):
+        """closes the shared session"""
+        session, self._session = self._session, None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+        await super(UrlFetcher, self).close()
+
+
+class RecordingFetcher(Fetcher):
+    """Fetches through 'fetcher' and records every response in
+    'archive', an Archive or the path of one, for ReplayFetcher."""
+
+    def __init__(self, fetcher, archive, *args, **kwargs):
+        self.fetcher = fetcher
+        if not isinstance(archive, Archive):
+            archive = Archive(archive)
+        self.archive = archive
+        kwargs.setdefault("coalesce", False)
+        super(RecordingFetcher, self).__init__(*args, **kwargs)
+
+    async def on_fetch(self, url, extra):
+        result = await self.fetcher._attempt(url, extra, extra.get("loop"))
+        response = result
+        if not isinstance(result, Response):
+            response = Response(url, 200, {}, result)
+        self.archive.put(response, extra.get("method", "GET"), url=url)
         return result
 
+    async def close(self):
+        await self.fetcher.close()
+        await super(RecordingFetcher, self).close()
+
+
+class ReplayFetcher(Fetcher):
+    """Serves the responses recorded in 'archive' without network.
+
+    Every answer waits 'latency' seconds to simulate the network, 0
+    replays at full speed. Urls which were not recorded raise FetchError
+    unless a 'fallback' fetcher is given.
+    """
+
+    def __init__(self, archive, *args, latency=0, fallback=None, **kwargs):
+        if not isinstance(archive, Archive):
+            archive = Archive(archive)
+        self.archive = archive
+        self.latency = latency
+        self.fallback = fallback
+        super(ReplayFetcher, self).__init__(*args, **kwargs)
+
+    async def on_fetch(self, url, extra):
+        response = self.archive.get(url, extra.get("method", "GET"))
+        if response is None:
+            if self.fallback is None:
+                raise FetchError(
+                    url, message="{} was not recorded".format(url)
+                )
+            return await self.fallback._attempt(url, extra, extra.get("loop"))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return response
+
+    async def close(self):
+        if self.fallback is not None:
+            await self.fallback.close()
+        await super(ReplayFetcher, self).close()
+
 
 def select_default_fetcher():
     """select default fetcher base on binary available"""
@@ -0,0 +1,122 @@
+"""content fingerprints for incremental crawls"""
+
+import json
+import sqlite3
+import threading
+from collections import Counter
+
+
+class FingerprintStats(object):
+    """counters of the pages and items skipped as unchanged"""
+
+    def __init__(self):
+        self.pages_changed = 0
+        self.pages_skipped = 0
+        self.items_changed = 0
+        self.items_skipped = 0
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class BaseFingerprints(object):
+    """Base fingerprint store. The last successful crawl of each page by
+    each item class is kept as the hash of the page content and the
+    fingerprints of the items extracted from it."""
+
+    def __init__(self):
+        self.stats = FingerprintStats()
+
+    def get(self, key):
+        """returns the stored fingerprint of key or None"""
+        raise NotImplementedError
+
+    def set(self, key, fingerprint):
+        raise NotImplementedError
+
+    def _last_crawl(self, name, url):
+        stored = self.get("{} {}".format(name, url))
+        return json.loads(stored) if stored else {"page": None, "items": []}
+
+    def page_changed(self, name, url, fingerprint):
+        """whether the page content differs from its last crawl"""
+        changed = self._last_crawl(name, url)["page"] != fingerprint
+        if changed:
+            self.stats.pages_changed += 1
+        else:
+            self.stats.pages_skipped += 1
+        return changed
+
+    def previous_items(self, name, url):
+        """the item fingerprints of the last crawl of the page, counted"""
+        return Counter(self._last_crawl(name, url)["items"])
+
+    def item_changed(self, previous, fingerprint):
+        """whether an item is new to the previous_items of its page,
+        items with equal values are matched one to one"""
+        changed = previous[fingerprint] <= 0
+        if changed:
+            self.stats.items_changed += 1
+        else:
+            previous[fingerprint] -= 1
+            self.stats.items_skipped += 1
+        return changed
+
+    def crawled(self, name, url, fingerprint, items):
+        """records a page extracted successfully with the fingerprints
+        of all of its items"""
+        self.set(
+            "{} {}".format(name, url),
+            json.dumps({"page": fingerprint, "items": list(items)}),
+        )
+
+
+class MemoryFingerprints(BaseFingerprints):
+    """Fingerprints kept for the life of the process."""
+
+    def __init__(self):
+        super(MemoryFingerprints, self).__init__()
+        self._fingerprints = {}
+
+    def get(self, key):
+        return self._fingerprints.get(key)
+
+    def set(self, key, fingerprint):
+        self._fingerprints[key] = fingerprint
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+
+class SQLiteFingerprints(BaseFingerprints):
+    """Fingerprints stored in a sqlite database at 'path', kept between
+    runs."""
+
+    def __init__(self, path):
+        super(SQLiteFingerprints, self).__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "key TEXT PRIMARY KEY, fingerprint TEXT)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM fingerprints WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, fingerprint):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?)",
+                (key, fingerprint),
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
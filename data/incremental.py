@@ -0,0 +1,241 @@
+"""incremental parsing: items captured while the page downloads
+
+The page is fed chunk by chunk to an html.parser based scanner which
+matches simple selectors on start tags. The markup of a matching
+element is kept until the element closes, then emitted and dropped,
+everything else is discarded as it is scanned. Elements whose end tag
+is optional in html, such as li, p or td, close where a browser would.
+"""
+
+import re
+from html.parser import HTMLParser
+
+VOID_ELEMENTS = frozenset(
+    (
+        "area base br col embed hr img input link meta param source "
+        "track wbr"
+    ).split()
+)
+
+_HEADINGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+# start tags implying the end of an open element of the key tag
+IMPLIED_END = {
+    "li": {"li"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "p": set(
+        (
+            "address article aside blockquote details div dl fieldset "
+            "figure footer form header hr main nav ol p pre section table "
+            "ul"
+        ).split()
+    ).union(_HEADINGS),
+    "option": {"option", "optgroup"},
+    "optgroup": {"optgroup"},
+    "tr": {"tr", "tbody", "tfoot"},
+    "td": {"td", "th", "tr", "tbody", "tfoot"},
+    "th": {"td", "th", "tr", "tbody", "tfoot"},
+    "thead": {"tbody", "tfoot"},
+    "tbody": {"tbody", "tfoot"},
+}
+
+# elements an implied end does not reach past
+SCOPES = frozenset(
+    "html body div dl ol select table tbody tfoot thead ul".split()
+)
+
+# parents the fragment of an element needs for parsers to keep it
+CONTEXTS = {
+    "tr": ("<table><tbody>", "</tbody></table>"),
+    "td": ("<table><tbody><tr>", "</tr></tbody></table>"),
+    "th": ("<table><tbody><tr>", "</tr></tbody></table>"),
+    "thead": ("<table>", "</table>"),
+    "tbody": ("<table>", "</table>"),
+    "tfoot": ("<table>", "</table>"),
+    "caption": ("<table>", "</table>"),
+    "colgroup": ("<table>", "</table>"),
+    "col": ("<table><colgroup>", "</colgroup></table>"),
+    "option": ("<select>", "</select>"),
+    "optgroup": ("<select>", "</select>"),
+}
+
+_START_TAG = re.compile(r"<([a-zA-Z][\w-]*)")
+
+_COMPOUND = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*|\*)?"
+    r"(?P<rest>(?:[.#][\w-]+|\[[\w-]+(?:[~|^$*]?=[^\]]*)?\])*)$"
+)
+_PART = re.compile(r"([.#])([\w-]+)|\[([\w-]+)(?:([~|^$*]?=)([^\]]*))?\]")
+
+
+class SimpleSelector(object):
+    """A compound selector of a tag, classes, an id and attributes,
+    such as 'div.item[data-id]'. Combinators are not supported."""
+
+    def __init__(self, selector):
+        match = _COMPOUND.match(selector.strip())
+        if not match or not selector.strip():
+            raise ValueError(
+                "{!r} is not a simple selector, incremental parsing only "
+                "matches a tag, classes, an id and attributes".format(selector)
+            )
+        tag = match.group("tag")
+        self.tag = None if tag in (None, "*") else tag.lower()
+        self.classes = []
+        self.id = None
+        self.attrs = []
+        for dot, name, attr, op, value in _PART.findall(match.group("rest")):
+            if dot == ".":
+                self.classes.append(name)
+            elif dot == "#":
+                self.id = name
+            else:
+                self.attrs.append((attr.lower(), op, value.strip("'\"")))
+
+    def matches(self, tag, attrs):
+        if self.tag is not None and tag != self.tag:
+            return False
+        if self.id is not None and attrs.get("id") != self.id:
+            return False
+        classes = (attrs.get("class") or "").split()
+        if any(name not in classes for name in self.classes):
+            return False
+        return all(
+            _attr_matches(attrs.get(name), op, value)
+            for name, op, value in self.attrs
+        )
+
+
+def _attr_matches(actual, op, value):
+    if actual is None:
+        return False
+    if not op:
+        return True
+    if op == "=":
+        return actual == value
+    if op == "~=":
+        return value in actual.split()
+    if op == "|=":
+        return actual == value or actual.startswith(value + "-")
+    if op == "^=":
+        return actual.startswith(value)
+    if op == "$=":
+        return actual.endswith(value)
+    return value in actual
+
+
+def in_context(markup):
+    """the captured markup of an element within the parents it needs,
+    parsers drop table rows, cells and options found out of place"""
+    match = _START_TAG.match(markup)
+    if match is None:
+        return markup
+    opening, closing = CONTEXTS.get(match.group(1).lower(), ("", ""))
+    return opening + markup + closing
+
+
+def parse_selector(selector):
+    """the SimpleSelectors of a selector group, ValueError when any of
+    them is not simple"""
+    return [SimpleSelector(part) for part in selector.split(",")]
+
+
+class SelectorCapture(HTMLParser):
+    """Feeds on html chunks and collects the markup of the elements
+    matching 'selector'. Matches nested in a match are part of it and
+    not emitted on their own. 'pop' returns the completed ones.
+
+    The open elements of the whole page are tracked, so a match also
+    ends when a start tag implies its end, as a sibling li does for an
+    open li, or when an element containing it ends. A match still open
+    when the parser is closed is completed then."""
+
+    def __init__(self, selector):
+        super(SelectorCapture, self).__init__(convert_charrefs=False)
+        self.selectors = parse_selector(selector)
+        self.completed = []
+        self._markup = None
+        # open elements of the page and the index of the match in them
+        self._stack = []
+        self._root = None
+
+    def pop(self):
+        completed, self.completed = self.completed, []
+        return completed
+
+    def close(self):
+        super(SelectorCapture, self).close()
+        if self._markup is not None:
+            self._complete()
+
+    def _append(self, text):
+        if self._markup is not None:
+            self._markup.append(text)
+
+    def _start(self, tag, attrs):
+        """ends the elements the tag implies the end of, then starts a
+        capture when the tag matches and none is open"""
+        self._close_implied(tag)
+        if self._markup is None:
+            values = {name: value or "" for name, value in attrs}
+            if any(s.matches(tag, values) for s in self.selectors):
+                self._markup = []
+                self._root = len(self._stack)
+        self._append(self.get_starttag_text())
+
+    def _close_implied(self, tag):
+        closed = None
+        for index in range(len(self._stack) - 1, -1, -1):
+            open_tag = self._stack[index]
+            if tag in IMPLIED_END.get(open_tag, ()):
+                closed = index
+            elif open_tag in SCOPES:
+                break
+        if closed is not None:
+            self._pop(closed)
+
+    def _pop(self, index):
+        """ends the open elements from index on"""
+        del self._stack[index:]
+        if self._root is not None and self._root >= index:
+            self._complete()
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(tag)
+        elif self._root == len(self._stack):
+            self._complete()
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs)
+        if self._root == len(self._stack):
+            self._complete()
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            # stray end tags are kept as they are
+            self._append("</{}>".format(tag))
+            return
+        index = len(self._stack) - 1 - self._stack[::-1].index(tag)
+        if self._root is not None and index >= self._root:
+            self._append("</{}>".format(tag))
+        self._pop(index)
+
+    def handle_data(self, data):
+        self._append(data)
+
+    def handle_entityref(self, name):
+        self._append("&{};".format(name))
+
+    def handle_charref(self, name):
+        self._append("&#{};".format(name))
+
+    def handle_comment(self, data):
+        self._append("<!--{}-->".format(data))
+
+    def _complete(self):
+        self.completed.append("".join(self._markup))
+        self._markup = None
+        self._root = None
@@ -0,0 +1,74 @@
+"""concurrency and rate limiting for outgoing requests"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+
+class TokenBucket(object):
+    """Token bucket refilled with 'rate' tokens per second holding at
+    most 'burst' tokens."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self):
+        """waits until a token is available and takes it"""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Limiter(object):
+    """Caps the number of requests in flight and the request rate per
+    host. Either limit is disabled when left as None."""
+
+    def __init__(self, concurrency=None, rate_limit=None, burst=1):
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self._buckets = {}
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def semaphore(self):
+        """semaphores are bound to their loop, so keep one per loop"""
+        loop = asyncio.get_event_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def bucket(self, url):
+        """returns the token bucket of the url's host"""
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_limit, self.burst)
+        return self._buckets[host]
+
+    @asynccontextmanager
+    async def limit(self, url):
+        """holds a concurrency slot and a rate token for the url"""
+        if self.concurrency:
+            async with self.semaphore():
+                if self.rate_limit:
+                    await self.bucket(url).acquire()
+                yield
+        else:
+            if self.rate_limit:
+                await self.bucket(url).acquire()
+            yield
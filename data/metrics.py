@@ -0,0 +1,203 @@
+"""crawl metrics and tracing hooks"""
+
+import json
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import aiohttp
+
+EVENTS = ("request", "parse", "field", "retry", "error")
+
+
+class Summary(object):
+    """count, sum and max of observed values"""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        return {"count": self.count, "sum": self.total, "max": self.max}
+
+
+class Metrics(object):
+    """Registry of crawl hooks and aggregated metrics.
+
+    Callbacks registered with 'on' receive the event name and a dict of
+    its data. Events are 'request' (url, host, status, bytes, elapsed and
+    dns, connect, ttfb when known), 'parse' (url, bytes, elapsed), 'field'
+    (item, field, elapsed, only when 'trace_fields' is set), 'retry'
+    (url, host, attempt, error) and 'error' (url, host, error). Every
+    event is also aggregated per host, item and field for the exporters.
+    """
+
+    def __init__(self, trace_fields=False):
+        self.trace_fields = trace_fields
+        self.in_flight = 0
+        self.counters = defaultdict(int)
+        self.summaries = defaultdict(Summary)
+        self._hooks = defaultdict(list)
+
+    def on(self, event, callback=None):
+        """register callback for event, usable as a decorator"""
+        if event not in EVENTS:
+            raise ValueError("Unknown event {!r}".format(event))
+        if callback is None:
+            return lambda func: self.on(event, func)
+        self._hooks[event].append(callback)
+        return callback
+
+    def off(self, event, callback):
+        self._hooks[event].remove(callback)
+
+    def emit(self, event, **data):
+        for callback in self._hooks[event]:
+            callback(event, data)
+
+    def request_started(self):
+        self.in_flight += 1
+
+    def request_ended(self):
+        """every started request ends, whether it finished, failed or
+        was cancelled"""
+        self.in_flight -= 1
+
+    def request_finished(self, url, elapsed, status=None, size=0, **timings):
+        host = urlparse(url).netloc
+        self.counters["requests_total", ("host", host)] += 1
+        self.counters["bytes_total", ("host", host)] += size
+        self.summaries["request_seconds", ("host", host)].observe(elapsed)
+        for name, value in timings.items():
+            if value is not None:
+                self.summaries[name + "_seconds", ("host", host)].observe(
+                    value
+                )
+        self.emit(
+            "request",
+            url=url,
+            host=host,
+            status=status,
+            bytes=size,
+            elapsed=elapsed,
+            **timings
+        )
+
+    def request_failed(self, url, error):
+        host = urlparse(url).netloc
+        self.counters["errors_total", ("host", host)] += 1
+        self.emit("error", url=url, host=host, error=error)
+
+    def retried(self, url, attempt, error):
+        host = urlparse(url).netloc
+        self.counters["retries_total", ("host", host)] += 1
+        self.emit("retry", url=url, host=host, attempt=attempt, error=error)
+
+    def parsed(self, url, size, elapsed):
+        self.summaries["parse_seconds", None].observe(elapsed)
+        self.emit("parse", url=url, bytes=size, elapsed=elapsed)
+
+    def field_extracted(self, item, field, elapsed):
+        labels = ("item", item, "field", field)
+        self.summaries["field_seconds", labels].observe(elapsed)
+        self.emit("field", item=item, field=field, elapsed=elapsed)
+
+    def trace_config(self):
+        """aiohttp trace config filling dns, connect and ttfb timings
+        into the dict given as trace_request_ctx"""
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(_mark("start"))
+        config.on_dns_resolvehost_start.append(_mark("dns_start"))
+        config.on_dns_resolvehost_end.append(_since("dns_start", "dns"))
+        config.on_connection_create_start.append(_mark("connect_start"))
+        config.on_connection_create_end.append(
+            _since("connect_start", "connect")
+        )
+        config.on_request_end.append(_since("start", "ttfb"))
+        return config
+
+    def as_dict(self):
+        """metrics as a json serializable dict"""
+        result = {"in_flight": self.in_flight, "counters": [], "summaries": []}
+        for (name, labels), value in sorted(self.counters.items()):
+            result["counters"].append(
+                {"name": name, "labels": _labels(labels), "value": value}
+            )
+        for (name, labels), summary in sorted(
+            self.summaries.items(), key=lambda x: (x[0][0], x[0][1] or ())
+        ):
+            entry = {"name": name, "labels": _labels(labels)}
+            entry.update(summary.as_dict())
+            result["summaries"].append(entry)
+        return result
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def to_prometheus(self, prefix="data"):
+        """metrics in the prometheus text exposition format"""
+        lines = [
+            "# TYPE {}_in_flight gauge".format(prefix),
+            "{}_in_flight {}".format(prefix, self.in_flight),
+        ]
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = "{}_{}".format(prefix, name)
+            if metric not in typed:
+                typed.add(metric)
+                lines.append("# TYPE {} counter".format(metric))
+            lines.append("{}{} {}".format(metric, _prom(labels), value))
+        for (name, labels), summary in sorted(
+            self.summaries.items(), key=lambda x: (x[0][0], x[0][1] or ())
+        ):
+            metric = "{}_{}".format(prefix, name)
+            if metric not in typed:
+                typed.add(metric)
+                lines.append("# TYPE {} summary".format(metric))
+            lines.append(
+                "{}_sum{} {}".format(metric, _prom(labels), summary.total)
+            )
+            lines.append(
+                "{}_count{} {}".format(metric, _prom(labels), summary.count)
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    labels = labels or ()
+    return dict(zip(labels[::2], labels[1::2]))
+
+
+def _prom(labels):
+    if not labels:
+        return ""
+    pairs = _labels(labels).items()
+    return "{%s}" % ",".join(
+        '{}="{}"'.format(key, str(value).replace('"', '\\"'))
+        for key, value in pairs
+    )
+
+
+def _mark(key):
+    async def callback(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx[key] = time.monotonic()
+
+    return callback
+
+
+def _since(start, key):
+    async def callback(session, ctx, params):
+        timings = ctx.trace_request_ctx
+        if timings is not None and start in timings:
+            timings[key] = time.monotonic() - timings[start]
+
+    return callback
@@ -0,0 +1,120 @@
+"""parsing and extraction in worker processes
+
+Workers receive the raw html with the import path of the item class,
+run the extraction there and send back plain 'values' dicts, so parsing
+runs on every core while the event loop keeps fetching.
+"""
+
+import asyncio
+import atexit
+import importlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from data.document import Document
+
+_pools = {}
+
+
+class OffloadError(Exception):
+    """the work cannot cross the process boundary, the extraction then
+    runs on the event loop instead"""
+
+
+# errors of the pool itself rather than of the extraction
+OFFLOAD_ERRORS = (OffloadError, pickle.PicklingError, BrokenProcessPool)
+
+
+def item_path(item_class):
+    """import path of an item class, None when workers cannot import it"""
+    qualname = item_class.__qualname__
+    if "<locals>" in qualname or item_class.__module__ == "__main__":
+        return None
+    return "{}:{}".format(item_class.__module__, qualname)
+
+
+def load_item(path):
+    """import the item class at path"""
+    module, qualname = path.split(":")
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def extract_values(path, html, url, whole=False):
+    """runs in the worker: parse html and return the pickled values of
+    every item found, or of the whole document as one item. Errors of
+    the extraction propagate, failing to import the item class or to
+    pickle the values raise OffloadError."""
+    try:
+        item_class = load_item(path)
+    except (ImportError, AttributeError) as exc:
+        raise OffloadError("cannot import {}: {!r}".format(path, exc))
+    document = Document(html, url, parser=item_class._meta.parser.parse)
+    if whole:
+        nodes = [document]
+    else:
+        nodes = item_class._select(document)
+    values = [
+        item_class(item=node, document=document).detach().values
+        for node in nodes
+    ]
+    try:
+        return pickle.dumps(values)
+    except Exception as exc:
+        raise OffloadError("cannot pickle the values: {!r}".format(exc))
+
+
+def needs_document(item_class, seen=None):
+    """whether items of the class, or the items nested in them by
+    relational fields, use their document after extraction, as sub page
+    fields do. Those items cannot come back detached from a worker."""
+    seen = set() if seen is None else seen
+    if item_class in seen:
+        return False
+    seen.add(item_class)
+    if getattr(item_class, "_subpage_fields", None):
+        return True
+    for field in getattr(item_class, "_fields", {}).values():
+        nested = getattr(field, "item", None)
+        if nested is not None and needs_document(nested, seen):
+            return True
+    return False
+
+
+def get_pool(workers):
+    """process pools are shared by every item class of the same size"""
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers)
+    return _pools[workers]
+
+
+def shutdown():
+    """shut every parse pool down"""
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown)
+
+
+async def extract(item_class, document, whole=False):
+    """extract the items of document in a worker process, returns None
+    when the item class cannot be offloaded"""
+    path = item_path(item_class)
+    if path is None or needs_document(item_class):
+        return None
+    loop = asyncio.get_event_loop()
+    pool = get_pool(item_class._meta.parse_workers)
+    try:
+        values = await loop.run_in_executor(
+            pool, extract_values, path, document.html, document.url, whole
+        )
+    except OFFLOAD_ERRORS as exc:
+        if isinstance(exc, BrokenProcessPool):
+            _pools.pop(item_class._meta.parse_workers, None)
+        return None
+    return [item_class.from_values(v) for v in pickle.loads(values)]
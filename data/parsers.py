@@ -0,0 +1,177 @@
+"""html parser backends
+
+Fields only rely on a small part of the BeautifulSoup api: 'select',
+'text', 'get' and 'str'. Every backend gives nodes supporting it, so a
+backend can be picked per item through 'Meta.parser'.
+"""
+
+import warnings
+from operator import methodcaller
+from bs4 import BeautifulSoup
+from bs4.builder import HTMLTreeBuilder
+from bs4.element import Tag
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml
+except ImportError:  # pragma: no cover
+    lxml = None
+
+try:
+    import soupsieve
+except ImportError:  # pragma: no cover
+    soupsieve = None
+
+DEFAULT_PARSER = "html.parser"
+
+
+class ParserBackend(object):
+    """Base parser backend."""
+
+    name = None
+    node_types = ()
+
+    def is_available(self):
+        return True
+
+    def parse(self, html):
+        """parse html into a root node"""
+        raise NotImplementedError(
+            "Parser backends have to implement this method"
+        )
+
+    def compile(self, selector):
+        """returns a function selecting the selector from a node"""
+        return methodcaller("select", selector)
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with the given tree builder"""
+
+    node_types = (Tag,)
+
+    def __init__(self, features):
+        self.name = features
+
+    def parse(self, html):
+        return BeautifulSoup(html, features=self.name)
+
+    def compile(self, selector):
+        if soupsieve is not None:
+            return soupsieve.compile(selector).select
+        return super(SoupBackend, self).compile(selector)
+
+
+class LxmlBackend(SoupBackend):
+    """BeautifulSoup on top of the lxml tree builder"""
+
+    def __init__(self):
+        super(LxmlBackend, self).__init__("lxml")
+
+    def is_available(self):
+        return lxml is not None
+
+
+class SelectolaxNode(object):
+    """BeautifulSoup like view over a selectolax node"""
+
+    __slots__ = ("node",)
+
+    LIST_ATTRIBUTES = getattr(
+        HTMLTreeBuilder,
+        "DEFAULT_CDATA_LIST_ATTRIBUTES",
+        getattr(HTMLTreeBuilder, "cdata_list_attributes", {}),
+    )
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def text(self):
+        return self.node.text(deep=True)
+
+    @property
+    def attrs(self):
+        return {key: self.get(key) for key in self.node.attributes}
+
+    def get(self, attr, default=None):
+        value = self.node.attributes.get(attr, default)
+        if value is not None and attr in self._list_attributes():
+            return value.split()
+        return value
+
+    def _list_attributes(self):
+        return tuple(self.LIST_ATTRIBUTES.get("*", ())) + tuple(
+            self.LIST_ATTRIBUTES.get(self.node.tag, ())
+        )
+
+    def select(self, selector):
+        return [SelectolaxNode(node) for node in self.node.css(selector)]
+
+    def __iter__(self):
+        return (SelectolaxNode(node) for node in self.node.iter())
+
+    def __str__(self):
+        return self.node.html
+
+    def __bool__(self):
+        return True
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax, a C html parser with its own css engine"""
+
+    name = "selectolax"
+    node_types = (SelectolaxNode,)
+
+    def is_available(self):
+        return SelectolaxParser is not None
+
+    def parse(self, html):
+        return SelectolaxNode(SelectolaxParser(html).root)
+
+
+PARSERS = {
+    "html.parser": SoupBackend("html.parser"),
+    "lxml": LxmlBackend(),
+    "selectolax": SelectolaxBackend(),
+}
+
+
+def get_parser(name=DEFAULT_PARSER):
+    """returns the parser backend registered under name, falling back
+    to html.parser when the backend is not installed"""
+    if isinstance(name, ParserBackend):
+        return name
+    try:
+        backend = PARSERS[name]
+    except KeyError:
+        raise ValueError(
+            "Unknown parser {!r}, expecting one of {}".format(
+                name, ", ".join(PARSERS)
+            )
+        )
+    if not backend.is_available():
+        warnings.warn(
+            "parser {} is not installed, falling back to {}".format(
+                name, DEFAULT_PARSER
+            )
+        )
+        backend = PARSERS[DEFAULT_PARSER]
+    return backend
+
+
+def is_node(obj):
+    """whether obj is a node of any parser backend"""
+    return any(isinstance(obj, p.node_types) for p in PARSERS.values())
@@ -0,0 +1,115 @@
+"""extraction plans compiled per item class"""
+
+import inspect
+import time
+from collections import namedtuple
+
+Step = namedtuple("Step", "name field selector clean bind coerce")
+
+
+def _owner(cls, attr):
+    """the class of the mro defining attr"""
+    for klass in cls.__mro__:
+        if attr in vars(klass):
+            return klass
+    return None
+
+
+def selects_once(field):
+    """whether the field value can be built from shared selector
+    matches, which holds unless a subclass overrides get_value alone"""
+    if not getattr(field, "selector", None):
+        return False
+    extract_owner = _owner(type(field), "extract")
+    get_value_owner = _owner(type(field), "get_value")
+    return extract_owner is not None and issubclass(
+        extract_owner, get_value_owner
+    )
+
+
+def _resolve_clean(item_class, name):
+    """returns the clean hook of a field and whether it takes the item"""
+    attr = "clean_%s" % name
+    hook = getattr(item_class, attr, None)
+    if hook is None:
+        return None, False
+    static = inspect.getattr_static(item_class, attr)
+    return hook, not isinstance(static, (staticmethod, classmethod))
+
+
+class ExtractionPlan(object):
+    """How an item class extracts its fields.
+
+    Built once per class: selectors are compiled by the parser backend,
+    clean hooks and coercers are resolved once and fields sharing a
+    selector reuse the same matches, so the tree is walked once per
+    distinct selector.
+    """
+
+    def __init__(self, item_class):
+        parser = item_class._meta.parser
+        metrics = item_class._meta.metrics
+        self.metrics = (
+            metrics if getattr(metrics, "trace_fields", False) else None
+        )
+        self.item_name = item_class.__name__
+        self.steps = []
+        self.selects = {}
+        for name, field in item_class._fields.items():
+            selector = field.selector if selects_once(field) else None
+            if selector is not None and selector not in self.selects:
+                self.selects[selector] = parser.compile(selector)
+            clean, bind = _resolve_clean(item_class, name)
+            self.steps.append(
+                Step(name, field, selector, clean, bind, field.coerce)
+            )
+        self.by_name = {step.name: step for step in self.steps}
+
+    def run(self, step, instance, q, matches):
+        """extract a single field, 'matches' caches selector results"""
+        if step.selector is not None:
+            tags = matches.get(step.selector)
+            if tags is None:
+                tags = matches[step.selector] = self.selects[step.selector](q)
+            value = step.field.extract(tags)
+        else:
+            value = step.field.get_value(q)
+        if step.clean is not None:
+            value = (
+                step.clean(instance, value) if step.bind else step.clean(value)
+            )
+        return step.coerce(value)
+
+    def extract_field(self, instance, name, q, matches):
+        """extract the named field alone, for lazy items"""
+        step = self.by_name[name]
+        if self.metrics is None:
+            return self.run(step, instance, q, matches)
+        start = time.perf_counter()
+        value = self.run(step, instance, q, matches)
+        self.metrics.field_extracted(
+            self.item_name, name, time.perf_counter() - start
+        )
+        return value
+
+    def extract(self, instance, q):
+        """extract every field of the item from q"""
+        matches = {}
+        if self.metrics is not None:
+            return self._traced_extract(instance, q, matches)
+        return {
+            step.name: self.run(step, instance, q, matches)
+            for step in self.steps
+        }
+
+    def _traced_extract(self, instance, q, matches):
+        """extract reporting the time of every field, a selector shared
+        by several fields is accounted to the first of them"""
+        values = {}
+        for step in self.steps:
+            start = time.perf_counter()
+            values[step.name] = self.run(step, instance, q, matches)
+            self.metrics.field_extracted(
+                self.item_name, step.name, time.perf_counter() - start
+            )
+        return values
@@ -0,0 +1,119 @@
+"""pool of warm webdriver instances"""
+
+import atexit
+import threading
+import weakref
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+
+# pools whose drivers are quit at exit, without keeping them alive
+_pools = weakref.WeakSet()
+
+
+def is_alive(driver):
+    """default health check, a dead driver fails to answer its url"""
+    try:
+        driver.current_url
+    except Exception:
+        return False
+    return True
+
+
+class DriverPool(object):
+    """Bounded pool of webdriver instances.
+
+    Drivers are created lazily by 'factory' up to 'size' instances and
+    handed out with checkout/checkin. A driver is recycled after it has
+    served 'max_pages' pages or when it fails the 'health_check'.
+    """
+
+    def __init__(self, factory, size=2, max_pages=100, health_check=is_alive):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.health_check = health_check
+        self._idle = LifoQueue()
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._generation = 0
+        _pools.add(self)
+
+    def checkout(self, timeout=None):
+        """take a healthy driver out of the pool, blocks while all
+        drivers are busy"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No driver available in pool")
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except Empty:
+                    return self._create()
+                if self.health_check(driver):
+                    return driver
+                self._discard(driver)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, driver, broken=False):
+        """return a driver to the pool, retiring it when it is broken
+        or has served its pages"""
+        with self._lock:
+            generation, pages = self._pages.get(id(driver), (None, 0))
+            self._pages[id(driver)] = (generation, pages + 1)
+            stale = generation != self._generation
+        if broken or stale or pages + 1 >= self.max_pages:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+        self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """checks out a driver for the duration of the block"""
+        driver = self.checkout(timeout=timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.health_check(driver)
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def close(self):
+        """quit every idle driver, busy drivers quit on checkin.
+        The pool stays usable and boots fresh drivers afterwards."""
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(driver)
+
+    def _create(self):
+        driver = self.factory()
+        with self._lock:
+            self._pages[id(driver)] = (self._generation, 0)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def close_pools():
+    """quit the idle drivers of every pool still alive"""
+    for pool in list(_pools):
+        pool.close()
+
+
+atexit.register(close_pools)
@@ -2,11 +2,15 @@
 
 import aiohttp
 import asyncio
+import codecs
 import hashlib
-from urllib.parse import urlencode, urlparse, urlunparse, parse_qsl
+from collections import namedtuple
+from urllib.parse import urlencode, urljoin, urlparse, urlunparse, parse_qsl
 
 DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
 
+Response = namedtuple("Response", ["url", "status", "headers", "body"])
+
 
 def url_concat(url, **args):
     """Concatenate url and arguments regardless of whether
@@ -37,17 +41,114 @@ def url_concat(url, **args):
     return url
 
 
-async def urlfetch(
-    url="", headers={}, params={}, payload={}, method="GET", loop=None
+def normalize_url(url, base=None):
+    """Normalize a url so equal pages compare equal.
+    Relative urls are joined on base, the scheme and host are lowercased,
+    default ports and fragments dropped and the query re-encoded the way
+    url_concat does."""
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url_concat(url))
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme, parsed.port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parsed.path or "/"
+    return urlunparse((scheme, netloc, path, parsed.params, parsed.query, ""))
+
+
+def create_session(
+    loop=None,
+    headers=None,
+    limit=100,
+    limit_per_host=0,
+    ttl_dns_cache=10,
+    keepalive_timeout=15,
+    trace_configs=None,
+    connect_timeout=None,
+    read_timeout=None,
 ):
-    """fetch content from the url"""
+    """create a pooled client session.
+
+    The connector keeps connections alive between requests, caps the
+    number of connections in total and per host and caches dns lookups,
+    so a session is meant to be shared across many fetches and closed
+    explicitly once done. 'connect_timeout' and 'read_timeout' bound
+    connecting and every socket read, in seconds."""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=ttl_dns_cache,
+        keepalive_timeout=keepalive_timeout,
+        loop=loop,
+    )
+    _headers = dict(DEFAULT_HEADERS)
+    _headers.update(headers or {})
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=_headers,
+        loop=loop,
+        trace_configs=trace_configs,
+        timeout=aiohttp.ClientTimeout(
+            total=5 * 60, sock_connect=connect_timeout, sock_read=read_timeout
+        ),
+    )
+
+
+async def _request(session, url, headers, params, payload, method, trace):
+    """issue the request on the given session and read the body"""
+    _method = getattr(session, method.lower())
+    async with _method(
+        url,
+        headers=headers,
+        params=params,
+        data=payload,
+        allow_redirects=True,
+        trace_request_ctx=trace,
+    ) as resp:
+        body = await resp.text(encoding="ISO-8859-1")
+        return Response(str(resp.url), resp.status, resp.headers, body)
+
+
+async def stream_body(url, session, headers=None, params={}, chunk_size=65536):
+    """yield the body of url decoded chunk by chunk as it arrives"""
+    decoder = codecs.getincrementaldecoder("ISO-8859-1")()
+    async with session.get(
+        url, headers=headers, params=params, allow_redirects=True
+    ) as resp:
+        async for chunk in resp.content.iter_chunked(chunk_size):
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def fetch_response(
+    url="",
+    headers={},
+    params={},
+    payload={},
+    method="GET",
+    loop=None,
+    session=None,
+    trace=None,
+):
+    """fetch the response of the url with its status and headers.
+
+    When a session is given it is reused and left open, otherwise a
+    one-off session is opened for this request alone. 'trace' is handed
+    to the session's trace configs as trace_request_ctx."""
     if not url:
         return
-    headers.update(DEFAULT_HEADERS)
-    async with aiohttp.ClientSession(loop=loop, headers=headers) as session:
-        _method = getattr(session, method.lower())
-        async with _method(
-            url, params=params, data=payload, allow_redirects=True
-        ) as resp:
-            result = await resp.text(encoding="ISO-8859-1")
-            return result
+    args = (params, payload, method, trace)
+    if session is not None:
+        return await _request(session, url, headers, *args)
+    async with create_session(loop=loop, headers=headers) as session:
+        return await _request(session, url, None, *args)
+
+
+async def urlfetch(url="", **kwargs):
+    """fetch content from the url"""
+    response = await fetch_response(url, **kwargs)
+    if response is not None:
+        return response.body
@@ -0,0 +1,114 @@
+"""retries, circuit breaking and fetch results"""
+
+import asyncio
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+TRANSIENT_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """A fetch failed with a transient status."""
+
+    def __init__(self, url, status=None, message=None):
+        self.url = url
+        self.status = status
+        super(FetchError, self).__init__(
+            message or "{} answered {}".format(url, status)
+        )
+
+
+class CircuitOpenError(FetchError):
+    """The host of the url is failing and is not being called."""
+
+    def __init__(self, url):
+        super(CircuitOpenError, self).__init__(
+            url, message="circuit open for {}".format(urlparse(url).netloc)
+        )
+
+
+class FetchResult(namedtuple("FetchResult", "url value error")):
+    """Outcome of a fetch, either a value or the error it failed with."""
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class RetryPolicy(object):
+    """Retry transient failures up to 'retries' times.
+
+    Network errors, timeouts and answers with one of 'statuses' are
+    retried after a jittered exponential backoff, a random delay up to
+    backoff * 2 ** attempt capped at 'max_backoff' seconds.
+    """
+
+    EXCEPTIONS = (aiohttp.ClientError, asyncio.TimeoutError, FetchError)
+
+    def __init__(
+        self,
+        retries=0,
+        backoff=0.5,
+        max_backoff=30,
+        statuses=TRANSIENT_STATUSES,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+    def delay(self, attempt):
+        """seconds to wait before retrying after attempt"""
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt)
+        )
+
+    def should_retry(self, exc, attempt):
+        if isinstance(exc, CircuitOpenError):
+            return False
+        return attempt < self.retries and isinstance(exc, self.EXCEPTIONS)
+
+
+class CircuitBreaker(object):
+    """Per host circuit breaker.
+
+    After 'threshold' consecutive failures a host is not called for
+    'reset_timeout' seconds, then a single trial request decides whether
+    it is closed again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened = {}
+
+    def check(self, url):
+        """raises CircuitOpenError while the host of url is open"""
+        host = urlparse(url).netloc
+        opened = self._opened.get(host)
+        if opened is None:
+            return
+        if time.monotonic() - opened < self.reset_timeout:
+            raise CircuitOpenError(url)
+        # half open, let this request through and wait for its outcome
+        self._opened[host] = time.monotonic()
+
+    def is_open(self, url):
+        return urlparse(url).netloc in self._opened
+
+    def success(self, url):
+        host = urlparse(url).netloc
+        self._failures.pop(host, None)
+        self._opened.pop(host, None)
+
+    def failure(self, url):
+        host = urlparse(url).netloc
+        failures = self._failures.get(host, 0) + 1
+        self._failures[host] = failures
+        if failures >= self.threshold:
+            self._opened[host] = time.monotonic()
@@ -0,0 +1,113 @@
+"""resolving item graphs through one bounded pool of workers"""
+
+import asyncio
+import itertools
+
+from data.requests import normalize_url
+from data.retry import FetchResult
+
+
+class _Field(object):
+    """results of one SubPageFields of one item, resolved on the item
+    once every link has an answer"""
+
+    def __init__(self, instance, field, size):
+        self.instance = instance
+        self.field = field
+        self.results = [None] * size
+        self.pending = size
+
+    def answer(self, index, result):
+        self.results[index] = result
+        self.pending -= 1
+        if not self.pending:
+            self.resolve()
+
+    def resolve(self):
+        results = self.field.resolve(self.instance, self.results)
+        self.instance.values[self.field.name] = results
+
+
+class Scheduler(object):
+    """Resolves the SubPageFields of an item graph breadth first.
+
+    Sub pages of every item, including items nested by RelationalField
+    and the items of sub pages, go through one priority queue ordered
+    by depth and are fetched by 'workers' tasks, so the whole graph is
+    crawled with bounded parallelism. Sub pages deeper than 'max_depth'
+    are left unresolved, awaiting them fetches them as usual. A page
+    linked several times in the graph is fetched once.
+    """
+
+    def __init__(self, workers=8, max_depth=None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self._order = itertools.count()
+        self._queue = None
+        self._pages = {}
+        self._seen = set()
+
+    def _walk(self, item, depth):
+        """queue the sub pages of item and of the items it nests"""
+        if id(item) in self._seen or not hasattr(item, "_subpage_fields"):
+            return
+        self._seen.add(id(item))
+        if self.max_depth is None or depth <= self.max_depth:
+            for field in type(item)._subpage_fields.values():
+                self._schedule(item, field, depth)
+        for value in item.values.values():
+            for nested in value if isinstance(value, list) else [value]:
+                self._walk(nested, depth)
+
+    def _schedule(self, item, field, depth):
+        links = field.links(item)
+        answers = _Field(item, field, len(links))
+        if not links:
+            answers.resolve()
+        for index, link in enumerate(links):
+            job = (item, field, link, answers, index)
+            self._queue.put_nowait((depth, next(self._order), job))
+
+    async def _fetch(self, item, field, link):
+        """one fetch per linked page, shared by every link to it"""
+        url = field._build_url(item, link)
+        key = (field.item, normalize_url(url) if url else url)
+        if key not in self._pages:
+            self._pages[key] = asyncio.ensure_future(field._result(item, link))
+        return await asyncio.shield(self._pages[key])
+
+    async def _worker(self):
+        while True:
+            depth, _, job = await self._queue.get()
+            item, field, link, answers, index = job
+            try:
+                result = await self._fetch(item, field, link)
+                if result.ok:
+                    try:
+                        for sub_item in self._items(result.value):
+                            self._walk(sub_item, depth + 1)
+                    except Exception as exc:
+                        result = FetchResult(link, None, exc)
+                answers.answer(index, result)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _items(value):
+        return value if isinstance(value, list) else [value]
+
+    async def resolve(self, items):
+        """resolve the graph of items, returns the items"""
+        self._queue = asyncio.PriorityQueue()
+        for item in items:
+            self._walk(item, 0)
+        workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return items
@@ -0,0 +1,165 @@
+"""batched export of items to files"""
+
+import csv
+import io
+import json
+
+from data.data import to_record
+from data.retry import FetchResult
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class Sink(object):
+    """Buffered writer of items.
+
+    Items are turned into records and kept until 'batch_size' of them
+    are buffered, the batch is then written at once. 'path' is a file
+    name or an open file object, which is left open by 'close'.
+    """
+
+    mode = "w"
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self.failures = []
+        self._buffer = []
+        self._file = None
+
+    def open(self):
+        if self._file is None:
+            if hasattr(self.path, "write"):
+                self._file = self.path
+            else:
+                self._file = open(self.path, self.mode, newline="")
+        return self._file
+
+    def write(self, item):
+        """buffer an item, a failed FetchResult is kept in 'failures'"""
+        if isinstance(item, FetchResult):
+            if not item.ok:
+                self.failures.append(item)
+                return
+            item = item.value
+        self._buffer.append(to_record(item))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, items):
+        for item in items:
+            self.write(item)
+
+    async def consume(self, items):
+        """write an async iterable, an awaitable or an iterable of items,
+        such as Item.stream, SubPageFields or the list of Item.all"""
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                self.write(item)
+            return
+        if hasattr(items, "__await__"):
+            items = await items
+        self.write_all(items)
+        failures = getattr(items, "failures", ())
+        self.failures.extend(failures)
+
+    def flush(self):
+        if self._buffer:
+            self.write_batch(self.open(), self._buffer)
+            self.written += len(self._buffer)
+            self._buffer = []
+
+    def write_batch(self, file, records):
+        raise NotImplementedError("Sinks have to implement this method")
+
+    def close(self):
+        self.flush()
+        if self._file is not None and self._file is not self.path:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class JsonLinesSink(Sink):
+    """One json object per line."""
+
+    def write_batch(self, file, records):
+        file.write("".join(json.dumps(r, default=str) + "\n" for r in records))
+
+
+class CsvSink(Sink):
+    """Csv rows with a header, the columns are 'fields' or the keys of
+    the first item. Lists and nested items are written as json."""
+
+    def __init__(self, path, batch_size=1000, fields=None):
+        super(CsvSink, self).__init__(path, batch_size)
+        self.fields = fields
+        self._header = False
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, default=str)
+        return value
+
+    def write_batch(self, file, records):
+        if self.fields is None:
+            self.fields = list(records[0])
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, self.fields, extrasaction="ignore", lineterminator="\n"
+        )
+        if not self._header:
+            writer.writeheader()
+            self._header = True
+        for record in records:
+            writer.writerow({k: self._cell(v) for k, v in record.items()})
+        file.write(buffer.getvalue())
+
+
+class ParquetSink(Sink):
+    """Parquet file written a row group per batch, needs pyarrow. The
+    schema is inferred from the first batch unless 'schema' is given."""
+
+    def __init__(self, path, batch_size=10000, schema=None):
+        if pyarrow is None:
+            raise ImportError("ParquetSink needs pyarrow installed")
+        super(ParquetSink, self).__init__(path, batch_size)
+        self.schema = schema
+
+    def open(self):
+        if self._file is None:
+            self._file = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+        return self._file
+
+    def write_batch(self, file, records):
+        file.write_table(
+            pyarrow.Table.from_pylist(records, schema=self.schema)
+        )
+
+    def flush(self):
+        if self._buffer and self.schema is None:
+            self.schema = pyarrow.Table.from_pylist(self._buffer).schema
+        super(ParquetSink, self).flush()
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
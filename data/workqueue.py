@@ -0,0 +1,184 @@
+"""work and result queues shared by distributed crawl workers"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from data.requests import normalize_url
+
+Task = namedtuple("Task", "id item url depth")
+
+
+def task_key(item, url):
+    """tasks are unique per item class and normalized url"""
+    return "{} {}".format(item, normalize_url(url))
+
+
+class BaseQueue(object):
+    """Work queue of (item class path, url) tasks and their results.
+
+    Pushing a task already pushed once is a no-op, so urls are crawled
+    once across every worker. Popped tasks are leased for 'lease'
+    seconds and given to another worker when not acknowledged in time.
+    A backend such as redis implements the same methods.
+    """
+
+    def __init__(self, lease=300):
+        self.lease = lease
+
+    def push(self, item, url, depth=0):
+        """queue a task, returns False when it was queued before"""
+        raise NotImplementedError
+
+    def pop(self):
+        """lease the next task, shallowest first, or return None"""
+        raise NotImplementedError
+
+    def ack(self, task, records=()):
+        """mark a leased task as done and store the records of the items
+        it extracted, at once. When the lease expired and another worker
+        completed the task first, nothing is stored and False returned."""
+        raise NotImplementedError
+
+    def fail(self, task, error):
+        """mark a leased task as failed with the error message"""
+        raise NotImplementedError
+
+    def results(self, after=0):
+        """yields (id, item, record) of the results stored after id"""
+        raise NotImplementedError
+
+    def pending(self):
+        """number of tasks queued or leased"""
+        raise NotImplementedError
+
+    def stats(self):
+        """number of tasks per state"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteQueue(BaseQueue):
+    """Queue in a sqlite database at 'path', shared by the processes of
+    one host. sqlite locking makes pop atomic across processes."""
+
+    def __init__(self, path, lease=300, timeout=30):
+        super(SQLiteQueue, self).__init__(lease)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, key TEXT UNIQUE, item TEXT, url TEXT, "
+            "depth INTEGER, state TEXT, leased_until REAL, error TEXT)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_state "
+            "ON tasks (state, depth, id)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY, task INTEGER, item TEXT, record TEXT)"
+        )
+
+    def push(self, item, url, depth=0):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO tasks (key, item, url, depth, state) "
+                "VALUES (?, ?, ?, ?, 'queued')",
+                (task_key(item, url), item, url, depth),
+            )
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def pop(self):
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id, item, url, depth FROM tasks "
+                "WHERE state = 'queued' "
+                "OR (state = 'leased' AND leased_until < ?) "
+                "ORDER BY depth, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE tasks SET state = 'leased', leased_until = ? "
+                    "WHERE id = ?",
+                    (now + self.lease, row[0]),
+                )
+        return Task(*row) if row is not None else None
+
+    def ack(self, task, records=()):
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET state = 'done' "
+                "WHERE id = ? AND state = 'leased'",
+                (task.id,),
+            )
+            if cursor.rowcount != 1:
+                return False
+            db.executemany(
+                "INSERT INTO results (task, item, record) VALUES (?, ?, ?)",
+                [
+                    (task.id, task.item, json.dumps(record, default=str))
+                    for record in records
+                ],
+            )
+        return True
+
+    def fail(self, task, error):
+        with self._lock:
+            self._db.execute(
+                "UPDATE tasks SET state = 'failed', error = ? "
+                "WHERE id = ? AND state = 'leased'",
+                (str(error), task.id),
+            )
+
+    def results(self, after=0):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, item, record FROM results WHERE id > ? "
+                "ORDER BY id",
+                (after,),
+            ).fetchall()
+        for result_id, item, record in rows:
+            yield result_id, item, json.loads(record)
+
+    def pending(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM tasks "
+                "WHERE state IN ('queued', 'leased')"
+            ).fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM tasks GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._db.close()
@@ -9,8 +9,6 @@ sys.path.insert(
 from data import data, fetcher
 from tests.base import async_test
 
-sem = asyncio.Semaphore(5)
-
 
 class StallMan(data.Item):
 
@@ -35,6 +33,19 @@ async def hello():
 # hello()
 
 
+@async_test
+async def many():
+    results = await StallMan.many(["/", "/archives/"], concurrency=5)
+    for result in results:
+        if result.ok:
+            print(result.url, result.value[0].urgent_items)
+        else:
+            print(result.url, "failed", result.error)
+
+
+# many()
+
+
 class MovieDetails(data.Item):
 
     movie_name = data.TextField(selector=".hidden-xs h1")
@@ -17,12 +17,21 @@ setup(
     author_email="plasmashadowx@gmail.com",
     url="https://github.com/sourcepirate/datastyle.git",
     license=LICENSE,
-    packages=find_packages(exclude=("tests", "docs")),
+    packages=find_packages(exclude=("tests", "docs", "benchmarks")),
     install_requires=[
         "aiohttp==3.7.4",
         "untangle==1.2.1",
         "beautifulsoup4==4.6.3",
         "selenium==3.141.0",
     ],
+    extras_require={
+        "lxml": ["lxml"],
+        "selectolax": ["selectolax"],
+        "parquet": ["pyarrow"],
+        "browser": ["playwright"],
+    },
+    entry_points={
+        "console_scripts": ["dataland-worker=data.distributed:main"],
+    },
     test_suite="tests",
 )
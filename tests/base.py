@@ -2,6 +2,8 @@
 import asyncio
 import inspect
 from unittest.mock import Mock
+from aiohttp import web
+from aiohttp.log import access_logger
 
 
 def async_test(func):
@@ -32,3 +34,16 @@ class AsyncMock(Mock):
 
     def __await__(self):
         return self().__await__()
+
+
+async def start_server(handler, access_log=access_logger):
+    """starts a local aiohttp server serving every path by handler,
+    requests are logged to 'access_log' unless it is None"""
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app, access_log=access_log)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, "http://127.0.0.1:{}".format(port)
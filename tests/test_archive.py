@@ -0,0 +1,98 @@
+"""testing record and replay"""
+import os
+import tempfile
+import time
+import unittest
+from aiohttp import web
+from tests.base import async_test, start_server
+from data import data
+from data.archive import Archive
+from data.fetcher import RecordingFetcher, ReplayFetcher, UrlFetcher
+from data.requests import Response
+from data.retry import FetchError
+
+
+class ArchiveTestCase(unittest.TestCase):
+    """archive in a temporary directory"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "crawl.db")
+
+
+class TestArchive(ArchiveTestCase):
+    """Testing Archive"""
+
+    def test_put_and_get_normalized(self):
+        archive = Archive(self.path)
+        archive.put(Response("http://a.com/x?b=1", 200, {"A": "1"}, "é" * 10))
+        response = archive.get("HTTP://a.com:80/x?b=1#top")
+        self.assertEqual(response.body, "é" * 10)
+        self.assertEqual(response.headers, {"A": "1"})
+        self.assertIsNone(archive.get("http://a.com/x?b=1", method="POST"))
+        self.assertEqual(len(archive), 1)
+        archive.close()
+
+
+class TestRecordReplay(ArchiveTestCase):
+    """Testing RecordingFetcher and ReplayFetcher"""
+
+    @async_test
+    async def test_replays_a_recorded_crawl(self):
+        async def handler(request):
+            return web.Response(
+                text="<h1>{}</h1>".format(request.path),
+                headers={"ETag": "v1"},
+            )
+
+        runner, base = await start_server(handler)
+        recorder = RecordingFetcher(UrlFetcher(), self.path)
+        try:
+            recorded = await recorder.fetch(base + "/a", params={"q": 1})
+        finally:
+            await recorder.close()
+            await runner.cleanup()
+
+        class Page(data.Item):
+            title = data.TextField(selector="h1")
+
+            class Meta:
+                base_url = base
+                fetcher = ReplayFetcher(self.path)
+
+        page = await Page.one("/a?q=1")
+        self.assertEqual(recorded, "<h1>/a</h1>")
+        self.assertEqual(page.title, "/a")
+        with self.assertRaises(FetchError):
+            await Page.one("/b")
+
+    @async_test
+    async def test_replays_a_redirected_url(self):
+        """responses are recorded under the url requested"""
+
+        async def handler(request):
+            if request.path == "/old":
+                raise web.HTTPFound("/new")
+            return web.Response(text="new")
+
+        runner, base = await start_server(handler)
+        recorder = RecordingFetcher(UrlFetcher(), self.path)
+        try:
+            await recorder.fetch(base + "/old")
+        finally:
+            await recorder.close()
+            await runner.cleanup()
+        replay = ReplayFetcher(self.path)
+        self.assertEqual(await replay.fetch(base + "/old"), "new")
+        response = replay.archive.get(base + "/old")
+        self.assertEqual(response.url, base + "/new")
+
+    @async_test
+    async def test_simulated_latency(self):
+        archive = Archive(self.path)
+        archive.put(Response("http://a.com/", 200, {}, "x"))
+        fetcher = ReplayFetcher(archive, latency=0.05)
+        start = time.perf_counter()
+        self.assertEqual(await fetcher.fetch("http://a.com/"), "x")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
@@ -0,0 +1,135 @@
+"""testing the async browser fetcher"""
+import asyncio
+import unittest
+from tests.base import async_test
+from data import data
+from data.fetcher import BrowserFetcher
+
+
+class FakeTab(object):
+    """tab of a FakeBrowser"""
+
+    def __init__(self, browser, blocked):
+        self.browser = browser
+        self.blocked = blocked
+        self.closed = False
+
+    async def render(self, url, wait_for=None, wait_until="load"):
+        browser = self.browser
+        browser.active += 1
+        browser.max_active = max(browser.max_active, browser.active)
+        try:
+            await asyncio.sleep(0.01)
+            for resource, kind in browser.resources.get(url, ()):
+                if kind not in self.blocked:
+                    browser.loaded.append(resource)
+            browser.waits.append((wait_for, wait_until))
+            return browser.pages[url]
+        finally:
+            browser.active -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser(object):
+    """browser serving canned pages, no process is started"""
+
+    launched = 0
+
+    def __init__(self, pages, resources=None):
+        self.pages = pages
+        self.resources = resources or {}
+        self.tabs = []
+        self.loaded = []
+        self.waits = []
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+
+    @classmethod
+    def factory(cls, *args, **kwargs):
+        browser = cls(*args, **kwargs)
+
+        async def launch():
+            cls.launched += 1
+            return browser
+
+        return browser, launch
+
+    async def new_tab(self, blocked=()):
+        tab = FakeTab(self, blocked)
+        self.tabs.append(tab)
+        return tab
+
+    async def close(self):
+        self.closed = True
+
+
+PAGES = {
+    "http://a.com/{}".format(i): "<h1>{}</h1>".format(i) for i in range(8)
+}
+
+
+class TestBrowserFetcher(unittest.TestCase):
+    """Testing BrowserFetcher"""
+
+    @async_test
+    async def test_one_browser_renders_in_reused_tabs(self):
+        browser, launch = FakeBrowser.factory(PAGES)
+        launched = FakeBrowser.launched
+        fetcher = BrowserFetcher(driver_factory=launch, pool_size=3)
+        pages = await asyncio.gather(*(fetcher.fetch(url) for url in PAGES))
+        self.assertEqual(pages, list(PAGES.values()))
+        self.assertEqual(FakeBrowser.launched - launched, 1)
+        self.assertEqual(len(browser.tabs), 3)
+        self.assertEqual(browser.max_active, 3)
+        await fetcher.close()
+        self.assertTrue(browser.closed)
+        self.assertTrue(all(tab.closed for tab in browser.tabs))
+
+    @async_test
+    async def test_tabs_are_recycled_after_max_pages(self):
+        browser, launch = FakeBrowser.factory(PAGES)
+        fetcher = BrowserFetcher(
+            driver_factory=launch, pool_size=1, max_pages=2
+        )
+        for url in list(PAGES)[:4]:
+            await fetcher.fetch(url)
+        self.assertEqual(len(browser.tabs), 2)
+        self.assertTrue(browser.tabs[0].closed)
+
+    @async_test
+    async def test_resources_are_blocked(self):
+        resources = {
+            "http://a.com/0": [
+                ("/app.js", "script"),
+                ("/logo.png", "image"),
+                ("/site.css", "stylesheet"),
+            ]
+        }
+        browser, launch = FakeBrowser.factory(PAGES, resources)
+        fetcher = BrowserFetcher(driver_factory=launch)
+        await fetcher.fetch("http://a.com/0")
+        self.assertEqual(browser.loaded, ["/app.js"])
+
+    @async_test
+    async def test_wait_condition_from_meta(self):
+        browser, launch = FakeBrowser.factory(PAGES)
+
+        class Title(data.Item):
+            title = data.TextField(selector="h1")
+
+            class Meta:
+                base_url = "http://a.com/"
+                fetcher = BrowserFetcher
+                driver_factory = launch
+                wait_for = "h1"
+                wait_until = "networkidle"
+                block_resources = ()
+
+        title = await Title.one("/3")
+        self.assertEqual(title.title, "3")
+        self.assertEqual(browser.waits, [("h1", "networkidle")])
+        self.assertEqual(Title._meta.fetcher.block_resources, ())
+        await Title.close()
@@ -0,0 +1,125 @@
+"""testing response caches"""
+import os
+import tempfile
+import unittest
+from aiohttp import web
+from tests.base import async_test, start_server
+from data.cache import CacheEntry, MemoryCache, SQLiteCache
+from data.fetcher import UrlFetcher
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Testing the lru memory cache"""
+
+    def test_lru_is_bounded(self):
+        """the least recently used entry is evicted"""
+        cache = MemoryCache(maxsize=2)
+        cache.set("a", CacheEntry.from_response("a"))
+        cache.set("b", CacheEntry.from_response("b"))
+        cache.get("a")
+        cache.set("c", CacheEntry.from_response("c"))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").body, "a")
+
+    def test_validators(self):
+        """etag and last modified become conditional headers"""
+        entry = CacheEntry.from_response(
+            "x", {"ETag": '"1"', "Last-Modified": "Mon"}
+        )
+        self.assertDictEqual(
+            entry.validators(),
+            {"If-None-Match": '"1"', "If-Modified-Since": "Mon"},
+        )
+
+
+class TestSQLiteCache(unittest.TestCase):
+    """Testing the on disk cache"""
+
+    def test_entries_persist(self):
+        """entries survive reopening the database"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = SQLiteCache(path)
+            cache.set("a", CacheEntry.from_response("body", {"ETag": "e"}))
+            cache.close()
+            entry = SQLiteCache(path).get("a")
+        self.assertEqual(entry.body, "body")
+        self.assertEqual(entry.etag, "e")
+
+
+class TestFetcherCache(unittest.TestCase):
+    """Testing conditional revalidation through the fetcher"""
+
+    @async_test
+    async def test_not_modified_served_from_cache(self):
+        """a 304 answer returns the cached body"""
+        served = []
+
+        async def handler(request):
+            served.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            return web.Response(text="page", headers={"ETag": '"v1"'})
+
+        runner, base = await start_server(handler)
+        cache = MemoryCache()
+        try:
+            async with UrlFetcher(cache=cache) as fetcher:
+                first = await fetcher.fetch(base + "/")
+                second = await fetcher.fetch(base + "/")
+        finally:
+            await runner.cleanup()
+        self.assertEqual(first, "page")
+        self.assertEqual(second, "page")
+        self.assertListEqual(served, [None, '"v1"'])
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.revalidated, 1)
+        self.assertEqual(cache.stats.bytes_saved, 4)
+
+    @async_test
+    async def test_fresh_entry_skips_request(self):
+        """entries younger than cache_max_age are served directly"""
+        served = []
+
+        async def handler(request):
+            served.append(request.path)
+            return web.Response(text="page")
+
+        runner, base = await start_server(handler)
+        cache = MemoryCache()
+        try:
+            async with UrlFetcher(cache=cache, cache_max_age=60) as fetcher:
+                await fetcher.fetch(base + "/")
+                await fetcher.fetch(base + "/")
+        finally:
+            await runner.cleanup()
+        self.assertEqual(len(served), 1)
+        self.assertEqual(cache.stats.hits, 1)
+
+    @async_test
+    async def test_only_plain_gets_are_cached(self):
+        """a POST after a cached GET of the same url is sent"""
+        served = []
+
+        async def handler(request):
+            served.append(request.method)
+            return web.Response(text=request.method)
+
+        runner, base = await start_server(handler)
+        cache = MemoryCache()
+        try:
+            async with UrlFetcher(cache=cache, cache_max_age=60) as fetcher:
+                first = await fetcher.fetch(base + "/a")
+                posted = await fetcher.fetch(
+                    base + "/a", method="POST", payload={"a": "1"}
+                )
+                second = await fetcher.fetch(base + "/a")
+        finally:
+            await runner.cleanup()
+        self.assertEqual(first, "GET")
+        self.assertEqual(posted, "POST")
+        self.assertEqual(second, "GET")
+        self.assertListEqual(served, ["GET", "POST"])
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.hits, 1)
@@ -0,0 +1,117 @@
+"""testing the pagination crawler"""
+import unittest
+from tests.base import async_test
+from data import data
+from data.crawler import BloomFilter, Crawler, SeenSet
+from data.fetcher import Fetcher
+from data.requests import normalize_url
+
+PAGES = {
+    "http://shop.com/": "<ul><li>a</li></ul><a class='next' href='/p2#top'>2</a>",
+    "http://shop.com/p2": "<ul><li>b</li></ul><a class='next' href='/p3'>3</a>"
+    "<a class='next' href='http://SHOP.com:80/'>1</a>",
+    "http://shop.com/p3": "<ul><li>c</li></ul><a class='next' href='/p2'>2</a>",
+}
+
+
+class PagesFetcher(Fetcher):
+    """serves PAGES and records the fetched urls"""
+
+    def __init__(self, *args, **kwargs):
+        super(PagesFetcher, self).__init__(*args, **kwargs)
+        self.fetched = []
+
+    async def on_fetch(self, url, extra):
+        self.fetched.append(url)
+        return PAGES[url]
+
+
+class Product(data.Item):
+    """product of a paginated listing"""
+
+    name = data.TextField(selector="li")
+
+    class Meta:
+        selector = "ul"
+        base_url = "http://shop.com/"
+        next_selector = "a.next"
+        fetcher = PagesFetcher
+
+
+class TestCrawler(unittest.TestCase):
+    """Testing Crawler"""
+
+    def setUp(self):
+        super(TestCrawler, self).setUp()
+        Product._meta.fetcher.fetched = []
+
+    @async_test
+    async def test_crawl_follows_next_pages_once(self):
+        """every page is fetched once however often it is linked"""
+        names = [item.name async for item in Product.crawl(workers=2)]
+        self.assertListEqual(sorted(names), ["a", "b", "c"])
+        self.assertEqual(len(Product._meta.fetcher.fetched), 3)
+
+    @async_test
+    async def test_max_pages(self):
+        """the crawl stops at max_pages"""
+        items = await Crawler(Product, max_pages=2).run()
+        self.assertListEqual([i.name for i in items], ["a", "b"])
+
+    @async_test
+    async def test_max_depth(self):
+        """links further than max_depth are not followed"""
+        items = await Crawler(Product, max_depth=0).run()
+        self.assertListEqual([i.name for i in items], ["a"])
+
+    @async_test
+    async def test_errors_are_collected(self):
+        """a failing page does not stop the crawl"""
+        crawler = Crawler(Product, next_selector="a")
+        PAGES["http://shop.com/p4"] = "<a href='/missing'>x</a>"
+        try:
+            items = await crawler.run("/p4")
+        finally:
+            del PAGES["http://shop.com/p4"]
+        self.assertListEqual(items, [])
+        self.assertEqual(crawler.errors[0][0], "http://shop.com/missing")
+
+    @async_test
+    async def test_item_crawl_reports_errors(self):
+        """the errors of Item.crawl are kept on the given crawler"""
+        crawler = Crawler(Product, next_selector="a")
+        PAGES["http://shop.com/p4"] = "<a href='/missing'>x</a>"
+        try:
+            items = [i async for i in Product.crawl("/p4", crawler=crawler)]
+        finally:
+            del PAGES["http://shop.com/p4"]
+        self.assertListEqual(items, [])
+        self.assertEqual(crawler.errors[0][0], "http://shop.com/missing")
+        with self.assertRaises(TypeError):
+            Product.crawl(crawler=crawler, workers=2)
+
+
+class TestSeen(unittest.TestCase):
+    """Testing the seen url sets"""
+
+    def test_normalize_url(self):
+        """equal pages normalize to the same url"""
+        self.assertEqual(
+            normalize_url("HTTP://Shop.com:80/p2#top"),
+            normalize_url("/p2", "http://shop.com/"),
+        )
+
+    def test_seen_set(self):
+        seen = SeenSet()
+        self.assertTrue(seen.add("a"))
+        self.assertFalse(seen.add("a"))
+
+    def test_bloom_filter(self):
+        """added urls are always found"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        urls = ["http://a.com/{}".format(i) for i in range(500)]
+        self.assertTrue(all(bloom.add(url) for url in urls[:250]))
+        self.assertFalse(any(bloom.add(url) for url in urls[:250]))
+        self.assertTrue(all(url in bloom for url in urls[:250]))
+        false_positives = sum(url in bloom for url in urls[250:])
+        self.assertLess(false_positives, 25)
@@ -1,3 +1,5 @@
+import asyncio
+import pickle
 import unittest
 from tests.base import async_test, AsyncMock
 from unittest.mock import patch, Mock
@@ -28,3 +30,209 @@ class TestDataItem(unittest.TestCase):
             )
             result = await StallMan.one("/")
             self.assertListEqual(result.urgent_items, ["1"])
+
+
+class Movie(data.Item):
+    """movie on a listing"""
+
+    name = data.TextField(selector="h1")
+
+
+class Listing(data.Item):
+    """listing linking to movies"""
+
+    movies = data.SubPageFields(Movie, link_selector="a")
+    titles = data.TextField(selector="li", repeated=True)
+
+    class Meta:
+        selector = "ul"
+        base_url = "http://movies.com/"
+        fetcher = PhatomJSFetcher
+
+
+class DelayedFetcher(Fetcher):
+    """answers sub pages after a delay encoded in the url"""
+
+    async def on_fetch(self, url, extra):
+        delay = int(url.rsplit("/", 1)[-1])
+        await asyncio.sleep(delay / 100)
+        return "<h1>{}</h1>".format(delay)
+
+
+class TestSubPageDeduplication(unittest.TestCase):
+    """Testing duplicate links and repeated awaits"""
+
+    @async_test
+    async def test_duplicate_links_are_fetched_once(self):
+        listing = Listing(
+            "<ul><a href='/1'></a><a href='http://movies.com/1#x'></a>"
+            "<a href='/2'></a></ul>"
+        )
+        fetcher = DelayedFetcher()
+        with patch.object(fetcher, "on_fetch", wraps=fetcher.on_fetch) as f:
+            with patch.object(listing._meta, "fetcher", fetcher):
+                first, second = await asyncio.gather(
+                    listing.movies, listing.movies
+                )
+                third = await listing.movies
+        self.assertEqual([m.name for m in first], ["1", "2"])
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+        self.assertEqual(f.call_count, 2)
+
+
+class TestItemStream(unittest.TestCase):
+    """Testing the streaming api"""
+
+    @async_test
+    async def test_stream_yields_items(self):
+        """stream yields one item per selector match"""
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = "<ul><li>1</li></ul><ul><li>2</li></ul>"
+            items = [item async for item in Listing.stream("/")]
+        self.assertListEqual([i.titles for i in items], [["1"], ["2"]])
+
+    @async_test
+    async def test_stream_subpages_in_completion_order(self):
+        """sub page results come out as their fetch completes"""
+        listing = Listing("<ul><a href='/3'></a><a href='/1'></a></ul>")
+        with patch.object(listing._meta, "fetcher", DelayedFetcher()):
+            results = [r async for r in listing.stream_subpages("movies")]
+            gathered = await listing.movies
+        self.assertListEqual([r.value.name for r in results], ["1", "3"])
+        self.assertListEqual([m.name for m in gathered], ["3", "1"])
+
+    @async_test
+    async def test_failed_subpages_are_reported(self):
+        """failures are kept apart from the items"""
+        listing = Listing("<ul><a href='/1'></a><a href='/x'></a></ul>")
+        with patch.object(listing._meta, "fetcher", DelayedFetcher()):
+            movies = await listing.movies
+        self.assertListEqual([m.name for m in movies], ["1"])
+        self.assertEqual(movies.failures[0].url, "/x")
+        self.assertIsInstance(movies.failures[0].error, ValueError)
+
+
+class Tag(data.Item):
+    """nested item"""
+
+    name = data.TextField(selector="b")
+
+    class Meta:
+        compact = True
+
+
+class Post(data.Item):
+    """compact item"""
+
+    title = data.TextField(selector="h2")
+    tags = data.RelationalField(Tag, selector="i", repeated=True)
+
+    class Meta:
+        selector = ".post"
+        compact = True
+
+
+class TestCompactItem(unittest.TestCase):
+    """Testing Meta.compact"""
+
+    html = "<div class='post'><h2>a</h2><i><b>x</b></i></div>"
+
+    @async_test
+    async def test_all_returns_records(self):
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = self.html
+            post = (await Post.all("/"))[0]
+        self.assertIsInstance(post, Post._record)
+        self.assertFalse(hasattr(post, "__dict__"))
+        self.assertFalse(hasattr(post, "_q"))
+        self.assertEqual(post.title, "a")
+        self.assertIsInstance(post.tags[0], Tag._record)
+        self.assertEqual(post.json(), {"title": "a", "tags": [post.tags[0]]})
+        self.assertEqual(data.to_record(post)["tags"], [{"name": "x"}])
+
+    @async_test
+    async def test_one_returns_a_record(self):
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = self.html
+            post = await Post.one("/")
+            with self.assertRaises(data.ItemDoesNotExist):
+                await Post.one("/", index=1)
+        self.assertIsInstance(post, Post._record)
+        self.assertEqual(post.title, "a")
+
+    def test_record_pickles(self):
+        record = Post._finish([Post(self.html)])[0]
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertEqual(record.fingerprint, Post(self.html).fingerprint)
+
+
+class PathFetcher(Fetcher):
+    """answers after the delay in the path, fails on 'x'"""
+
+    def __init__(self, **kwargs):
+        super(PathFetcher, self).__init__(**kwargs)
+        self.active = 0
+        self.max_active = 0
+
+    async def on_fetch(self, url, extra):
+        name = url.rsplit("/", 1)[-1]
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if name == "x":
+                raise ValueError(url)
+            await asyncio.sleep(int(name) / 100)
+            return "<h1>{}</h1>".format(name)
+        finally:
+            self.active -= 1
+
+
+class TestItemMany(unittest.TestCase):
+    """Testing Item.many and Item.stream_many"""
+
+    def setUp(self):
+        self.fetcher = PathFetcher()
+        patcher = patch.object(Movie._meta, "fetcher", self.fetcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @async_test
+    async def test_results_in_input_order(self):
+        results = await Movie.many(["/3", "/x", "/1", "/2"], concurrency=2)
+        self.assertEqual(
+            [r.value[0].name if r.ok else None for r in results],
+            ["3", None, "1", "2"],
+        )
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertEqual(results[0].url, "/3")
+        self.assertEqual(self.fetcher.max_active, 2)
+
+    @async_test
+    async def test_concurrency(self):
+        for concurrency in (0, -1):
+            with self.assertRaises(ValueError):
+                await Movie.many(["/1", "/2"], concurrency=concurrency)
+        results = await Movie.many(["/1"], concurrency=100)
+        self.assertEqual([r.value[0].name for r in results], ["1"])
+        self.assertEqual(await Movie.many([]), [])
+        paths = (path for path in ["/2", "/1"])
+        results = await Movie.many(paths, concurrency=5)
+        self.assertEqual([r.value[0].name for r in results], ["2", "1"])
+
+    @async_test
+    async def test_stream_in_completion_order(self):
+        names = [
+            result.value[0].name
+            async for result in Movie.stream_many(["/3", "/1", "/2"], 3)
+        ]
+        self.assertEqual(names, ["1", "2", "3"])
+
+    @async_test
+    async def test_stopping_early_cancels_the_rest(self):
+        stream = Movie.stream_many(["/1", "/9", "/8"], 3)
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        self.assertEqual(first.value[0].name, "1")
+        self.assertEqual(self.fetcher.active, 0)
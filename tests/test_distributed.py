@@ -0,0 +1,141 @@
+"""testing the distributed work queue and workers"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from tests.base import async_test
+from tests.test_crawler import Product
+from data.distributed import Worker, main, submit
+from data.workqueue import SQLiteQueue
+
+PRODUCT = "tests.test_crawler:Product"
+
+
+class QueueTestCase(unittest.TestCase):
+    """queue in a temporary directory"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "queue.db")
+        self.queue = SQLiteQueue(self.path)
+        self.addCleanup(self.queue.close)
+
+
+class TestSQLiteQueue(QueueTestCase):
+    """Testing SQLiteQueue"""
+
+    def test_urls_are_queued_once(self):
+        self.assertTrue(self.queue.push(PRODUCT, "http://a.com/x"))
+        self.assertFalse(self.queue.push(PRODUCT, "HTTP://a.com:80/x#y"))
+        self.assertTrue(self.queue.push("other:Item", "http://a.com/x"))
+        self.assertEqual(self.queue.pending(), 2)
+
+    def test_shallow_tasks_first_and_leases(self):
+        self.queue.push(PRODUCT, "http://a.com/deep", depth=2)
+        self.queue.push(PRODUCT, "http://a.com/top")
+        other = SQLiteQueue(self.path, lease=0)
+        self.addCleanup(other.close)
+        first = self.queue.pop()
+        self.assertEqual(first.url, "http://a.com/top")
+        second = other.pop()
+        self.assertEqual(second.url, "http://a.com/deep")
+        # the lease of 'other' expired at once, the task is handed out again
+        self.assertEqual(self.queue.pop(), second)
+        self.assertIsNone(self.queue.pop())
+        self.queue.ack(first)
+        self.queue.fail(second, "boom")
+        self.assertEqual(self.queue.stats(), {"done": 1, "failed": 1})
+        self.assertEqual(self.queue.pending(), 0)
+
+    def test_results(self):
+        self.queue.push(PRODUCT, "http://a.com/")
+        task = self.queue.pop()
+        self.assertTrue(self.queue.ack(task, [{"name": "a"}, {"name": "b"}]))
+        results = list(self.queue.results())
+        self.assertEqual([r[2]["name"] for r in results], ["a", "b"])
+        self.assertEqual(len(list(self.queue.results(results[0][0]))), 1)
+
+    def test_results_of_an_expired_lease_are_stored_once(self):
+        """a task processed again after its lease expired keeps the
+        results of the first worker completing it"""
+        self.queue.push(PRODUCT, "http://a.com/")
+        other = SQLiteQueue(self.path, lease=0)
+        self.addCleanup(other.close)
+        expired = other.pop()
+        task = self.queue.pop()
+        self.assertEqual(task, expired)
+        self.assertTrue(self.queue.ack(task, [{"name": "a"}]))
+        self.assertFalse(other.ack(expired, [{"name": "a"}]))
+        other.fail(expired, "late")
+        self.assertEqual(len(list(self.queue.results())), 1)
+        self.assertEqual(self.queue.stats(), {"done": 1})
+
+
+class TestWorker(QueueTestCase):
+    """Testing Worker"""
+
+    @async_test
+    async def test_workers_share_the_crawl(self):
+        submit(self.queue, Product, "/")
+        other = SQLiteQueue(self.path)
+        self.addCleanup(other.close)
+        workers = await asyncio.gather(
+            Worker(self.queue, idle=0.01).run(),
+            Worker(other, idle=0.01).run(),
+        )
+        self.assertEqual(sum(w.done for w in workers), 3)
+        names = sorted(r[2]["name"] for r in self.queue.results())
+        self.assertEqual(names, ["a", "b", "c"])
+
+    @async_test
+    async def test_queue_operations_run_off_the_loop(self):
+        threads = set()
+
+        class TracedQueue(SQLiteQueue):
+            def pop(self):
+                threads.add(threading.current_thread())
+                return super(TracedQueue, self).pop()
+
+        queue = TracedQueue(self.path)
+        self.addCleanup(queue.close)
+        submit(queue, Product, "/")
+        await Worker(queue, idle=0.01).run()
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(queue.stats(), {"done": 3})
+
+    @async_test
+    async def test_max_depth(self):
+        submit(self.queue, Product, "/")
+        await Worker(self.queue, max_depth=1).run()
+        self.assertEqual(self.queue.stats(), {"done": 2})
+
+    def test_local_classes_cannot_be_submitted(self):
+        class Local(Product):
+            pass
+
+        with self.assertRaises(ValueError):
+            submit(self.queue, Local)
+
+
+class TestMain(QueueTestCase):
+    """Testing the worker command"""
+
+    def test_processes_drain_the_queue(self):
+        results = self.path + ".jsonl"
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(
+                [self.path, "--submit", PRODUCT, "/", "--workers", "2"]
+                + ["--results", results]
+            )
+        self.assertEqual(json.loads(output.getvalue()), {"done": 3})
+        with open(results) as lines:
+            records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            sorted(r["record"]["name"] for r in records), ["a", "b", "c"]
+        )
@@ -0,0 +1,49 @@
+"""testing parsed documents"""
+import unittest
+from unittest.mock import Mock
+from untangle import parse
+from data import data
+from data.document import Document, parse_html, tag_to_element
+
+
+class Title(data.Item):
+    """title of a page"""
+
+    title = data.TextField(selector="h1")
+
+
+class TestDocument(unittest.TestCase):
+    """Testing Document"""
+
+    def test_parsed_once(self):
+        """the tree is built once and selections are memoized"""
+        parser = Mock(side_effect=parse_html)
+        document = Document("<h1>a</h1><h1>b</h1>", parser=parser)
+        first = document.select("h1")
+        self.assertIs(first, document.select("h1"))
+        self.assertIs(document.tree, document.tree)
+        self.assertEqual(parser.call_count, 1)
+
+    def test_item_shares_tree(self):
+        """an item built from a document works on its tree"""
+        document = Document("<h1>a</h1>", url="http://a.com/")
+        item = Title(item=document)
+        self.assertIs(item._q, document.tree)
+        self.assertIs(item._document, document)
+        self.assertEqual(item.title, "a")
+
+
+class TestTagToElement(unittest.TestCase):
+    """Testing the direct untangle conversion"""
+
+    def test_matches_untangle_parse(self):
+        """the element has the shape untangle.parse gives"""
+        markup = "<ul class='a b'><li data-x='1'>1<b>2</b></li><!--c--></ul>"
+        tag = parse_html(markup).ul
+        built = tag_to_element(tag)
+        parsed = parse(str(tag))
+        self.assertEqual(built.ul["class"], parsed.ul["class"])
+        self.assertEqual(built.ul.li["data-x"], "1")
+        self.assertEqual(built.ul.li.cdata, parsed.ul.li.cdata)
+        self.assertEqual(built.ul.li.b.cdata, "2")
+        self.assertEqual(built.ul.cdata, parsed.ul.cdata)
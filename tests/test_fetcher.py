@@ -0,0 +1,108 @@
+"""testing fetchers"""
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from tests.base import async_test, start_server
+from data.fetcher import Fetcher, UrlFetcher
+
+
+class ThreadNameFetcher(Fetcher):
+    """blocking fetcher answering with the worker thread name"""
+
+    def on_fetch(self, url, extra):
+        return threading.current_thread().name
+
+
+class TestUrlFetcher(unittest.TestCase):
+    """Testing the pooled url fetcher"""
+
+    @async_test
+    async def test_session_is_reused(self):
+        """consecutive fetches go through one session"""
+
+        async def handler(request):
+            return web.Response(text=request.path)
+
+        runner, base = await start_server(handler)
+        try:
+            async with UrlFetcher(limit_per_host=2) as fetcher:
+                first = await fetcher.fetch(base + "/one")
+                session = fetcher.get_session()
+                second = await fetcher.fetch(base + "/two")
+                self.assertIs(session, fetcher.get_session())
+                self.assertEqual(first, "/one")
+                self.assertEqual(second, "/two")
+            self.assertTrue(session.closed)
+        finally:
+            await runner.cleanup()
+
+
+class TestFetcherExecutor(unittest.TestCase):
+    """Testing the executor shared by blocking fetchers"""
+
+    def test_executor_is_lazy(self):
+        """no executor is created until a blocking fetch happens"""
+        fetcher = ThreadNameFetcher(executor="thread")
+        self.assertIsNone(fetcher._executor)
+
+    @async_test
+    async def test_executor_is_reused_and_shutdown(self):
+        """one executor serves every fetch until the fetcher closes"""
+        fetcher = ThreadNameFetcher(executor="thread", max_workers=1)
+        first = await fetcher.fetch("http://a.com/1")
+        executor = fetcher.get_executor()
+        second = await fetcher.fetch("http://a.com/2")
+        self.assertIsInstance(executor, ThreadPoolExecutor)
+        self.assertEqual(executor._max_workers, 1)
+        self.assertEqual(first, second)
+        await fetcher.close()
+        self.assertTrue(executor._shutdown)
+        self.assertIsNone(fetcher._executor)
+
+
+class CountingFetcher(Fetcher):
+    """counts the requests reaching on_fetch"""
+
+    def __init__(self, **kwargs):
+        super(CountingFetcher, self).__init__(**kwargs)
+        self.urls = []
+
+    async def on_fetch(self, url, extra):
+        self.urls.append(url)
+        await asyncio.sleep(0.01)
+        return url
+
+
+class TestCoalescing(unittest.TestCase):
+    """Testing in flight request coalescing"""
+
+    @async_test
+    async def test_concurrent_requests_share_one_fetch(self):
+        fetcher = CountingFetcher()
+        results = await asyncio.gather(
+            fetcher.fetch("http://a.com/x"),
+            fetcher.fetch("HTTP://A.com:80/x#top"),
+            fetcher.fetch("http://a.com/y"),
+        )
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(fetcher.urls), 2)
+        self.assertEqual(fetcher._in_flight, {})
+
+    @async_test
+    async def test_sequential_and_post_requests_are_not_shared(self):
+        fetcher = CountingFetcher()
+        await fetcher.fetch("http://a.com/x")
+        await fetcher.fetch("http://a.com/x")
+        await asyncio.gather(
+            fetcher.fetch("http://a.com/x", method="POST"),
+            fetcher.fetch("http://a.com/x", method="POST"),
+        )
+        self.assertEqual(len(fetcher.urls), 4)
+
+    @async_test
+    async def test_disabled(self):
+        fetcher = CountingFetcher(coalesce=False)
+        await asyncio.gather(*(fetcher.fetch("http://a.com/x") for _ in "ab"))
+        self.assertEqual(len(fetcher.urls), 2)
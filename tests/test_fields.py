@@ -11,6 +11,12 @@ from untangle import Element
 q = partial(BeautifulSoup, features="html.parser")
 
 
+class ParserTestCase(unittest.TestCase):
+    """Field tests parsing their fixtures with 'parse'"""
+
+    parse = staticmethod(q)
+
+
 class TestBaseField(unittest.TestCase):
     """Testing BaseField"""
 
@@ -36,12 +42,12 @@ class TestBaseField(unittest.TestCase):
         self.assertEqual(value, "coerce:coerce")
 
 
-class TestTextField(unittest.TestCase):
+class TestTextField(ParserTestCase):
     """Testing TextField"""
 
     def setUp(self):
         super(TestTextField, self).setUp()
-        self._html = q(
+        self._html = self.parse(
             "<ul><li attr='big'>1</li><li attr2='small'>2</li></ul>"
         )
 
@@ -61,12 +67,12 @@ class TestTextField(unittest.TestCase):
         self.assertListEqual(["1", "2"], field.get_value(self._html))
 
 
-class TestAttributeValueField(unittest.TestCase):
+class TestAttributeValueField(ParserTestCase):
     """Testing Attribute field"""
 
     def setUp(self):
         super(TestAttributeValueField, self).setUp()
-        self._html = q(
+        self._html = self.parse(
             "<ul><li attr='big'>1</li><li attr2='small'>2</li></ul>"
         )
 
@@ -88,12 +94,12 @@ class TestAttributeValueField(unittest.TestCase):
         self.assertListEqual(["big", None], field.get_value(self._html))
 
 
-class TestHtmlField(unittest.TestCase):
+class TestHtmlField(ParserTestCase):
     """Testing Html Field"""
 
     def setUp(self):
         super(TestHtmlField, self).setUp()
-        self._html = q("<ul><li>1</li><li>2</li></ul>")
+        self._html = self.parse("<ul><li>1</li><li>2</li></ul>")
 
     def test_get_value_htmlnorepeat(self):
         """testing the get value base on html no repeat"""
@@ -108,12 +114,12 @@ class TestHtmlField(unittest.TestCase):
         )
 
 
-class TestRelationalField(unittest.TestCase):
+class TestRelationalField(ParserTestCase):
     """Testing relational field"""
 
     def setUp(self):
         super(TestRelationalField, self).setUp()
-        self._html = q("<ul><li>1</li><li>2</li></ul>")
+        self._html = self.parse("<ul><li>1</li><li>2</li></ul>")
 
     def test_get_value_for_related_item(self):
         """test whether the related item takes html from parent
@@ -125,12 +131,12 @@ class TestRelationalField(unittest.TestCase):
         self.assertIsNotNone(value)
 
 
-class TestDomObjectField(unittest.TestCase):
+class TestDomObjectField(ParserTestCase):
     """Testing dom dict field"""
 
     def setUp(self):
         super(TestDomObjectField, self).setUp()
-        self._html = q("<ul><li>1</li><li>2</li></ul>")
+        self._html = self.parse("<ul><li>1</li><li>2</li></ul>")
 
     def test_get_for_domdict_no_repeat(self):
         """test value get if no repeat"""
@@ -0,0 +1,135 @@
+"""testing incremental crawls with fingerprints"""
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from tests.base import async_test, AsyncMock
+from data import data
+from data.fetcher import Fetcher
+from data.fingerprints import MemoryFingerprints, SQLiteFingerprints
+
+
+class Row(data.Item):
+    """row of a table"""
+
+    name = data.TextField(selector="b")
+
+    class Meta:
+        selector = ".row"
+        base_url = "http://rows.com/"
+
+
+def page(*names):
+    return "".join("<p class='row'><b>{}</b></p>".format(n) for n in names)
+
+
+class TestItemHashes(unittest.TestCase):
+    """Testing md5hash and fingerprint"""
+
+    def test_md5hash_of_markup(self):
+        row = Row(item=data._q(page("a")).select(".row")[0])
+        markup = '<p class="row"><b>a</b></p>'.encode("utf-8")
+        self.assertEqual(row.md5hash, hashlib.md5(markup).hexdigest())
+        self.assertIsNone(row.detach().md5hash)
+
+    def test_fingerprint_of_values(self):
+        first, second, other = data._q(page("a", "a", "b")).select(".row")
+        self.assertEqual(
+            Row(item=first).fingerprint, Row(item=second).fingerprint
+        )
+        self.assertNotEqual(
+            Row(item=first).fingerprint, Row(item=other).fingerprint
+        )
+        self.assertEqual(
+            Row(item=first).fingerprint, Row(item=first).detach().fingerprint
+        )
+
+
+class TestIncremental(unittest.TestCase):
+    """Testing Meta.fingerprints"""
+
+    def setUp(self):
+        self.store = MemoryFingerprints()
+        patcher = patch.object(Row._meta, "fingerprints", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def crawl(self, html, path="/"):
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = html
+            return [r.name for r in await Row.all(path)]
+
+    @async_test
+    async def test_unchanged_page_is_skipped(self):
+        self.assertEqual(await self.crawl(page("a", "b")), ["a", "b"])
+        with patch.object(Row, "_select") as select:
+            self.assertEqual(await self.crawl(page("a", "b")), [])
+            select.assert_not_called()
+        self.assertEqual(self.store.stats.pages_skipped, 1)
+
+    @async_test
+    async def test_only_new_items_of_changed_page(self):
+        await self.crawl(page("a", "b"))
+        self.assertEqual(await self.crawl(page("c", "a", "b")), ["c"])
+        self.assertEqual(self.store.stats.items_skipped, 2)
+
+    @async_test
+    async def test_equal_items_of_a_first_crawl(self):
+        """rows with equal values are all new on the first crawl"""
+        self.assertEqual(
+            await self.crawl(page("a", "a", "b")), ["a", "a", "b"]
+        )
+        self.assertEqual(await self.crawl(page("a", "a", "a", "b")), ["a"])
+
+    @async_test
+    async def test_items_are_scoped_per_page(self):
+        """items are compared with the last crawl of their own page"""
+        await self.crawl(page("a", "b"), "/one")
+        self.assertEqual(await self.crawl(page("a"), "/two"), ["a"])
+
+    @async_test
+    async def test_failed_extraction_is_not_recorded(self):
+        """a page whose extraction raised is extracted again"""
+        with patch.object(Row, "_select", side_effect=ValueError("boom")):
+            with self.assertRaises(ValueError):
+                await self.crawl(page("a"))
+        self.assertEqual(await self.crawl(page("a")), ["a"])
+        self.assertEqual(await self.crawl(page("a")), [])
+
+    @async_test
+    async def test_one_ignores_fingerprints(self):
+        """an unchanged page still has its items"""
+        await self.crawl(page("a", "b"))
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = page("a", "b")
+            self.assertEqual((await Row.one("/")).name, "a")
+            self.assertEqual((await Row.one("/", index=1)).name, "b")
+        self.assertEqual(self.store.stats.pages_skipped, 0)
+
+    @async_test
+    async def test_stream_skips_unchanged(self):
+        await self.crawl(page("a"))
+        with patch.object(Fetcher, "fetch", new_callable=AsyncMock) as fm:
+            fm.return_value = page("a", "d")
+            names = [r.name async for r in Row.stream("/")]
+        self.assertEqual(names, ["d"])
+
+
+class TestSQLiteFingerprints(unittest.TestCase):
+    """Testing SQLiteFingerprints"""
+
+    def test_kept_between_stores(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fingerprints.db")
+            store = SQLiteFingerprints(path)
+            self.assertTrue(store.page_changed("Row", "http://a.com/", "1"))
+            store.crawled("Row", "http://a.com/", "1", ["x", "x"])
+            store.close()
+            store = SQLiteFingerprints(path)
+            self.assertFalse(store.page_changed("Row", "http://a.com/", "1"))
+            self.assertTrue(store.page_changed("Row", "http://a.com/", "2"))
+            self.assertTrue(store.page_changed("Other", "http://a.com/", "1"))
+            previous = store.previous_items("Row", "http://a.com/")
+            self.assertDictEqual(dict(previous), {"x": 2})
+            store.close()
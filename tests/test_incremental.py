@@ -0,0 +1,201 @@
+"""testing incremental parsing"""
+import asyncio
+import unittest
+from unittest.mock import patch
+from aiohttp import web
+from tests.base import async_test, start_server
+from data import data
+from data.fetcher import Fetcher, UrlFetcher
+from data.incremental import SelectorCapture, SimpleSelector, in_context
+from data.parsers import PARSERS
+from data.plan import ExtractionPlan
+
+BLOCK = "<div class='row' data-id='{0}'><b>{0}</b> &amp; <i>x</i></div>"
+
+
+class Row(data.Item):
+    """repeated block of a large page"""
+
+    name = data.TextField(selector="b")
+    text = data.TextField(selector="i")
+
+    class Meta:
+        selector = "div.row"
+        fetcher = UrlFetcher
+
+
+class TestSimpleSelector(unittest.TestCase):
+    """Testing SimpleSelector"""
+
+    def test_matches(self):
+        selector = SimpleSelector("div.a.b#c[data-x^='y']")
+        attrs = {"class": "b a", "id": "c", "data-x": "yes"}
+        self.assertTrue(selector.matches("div", attrs))
+        self.assertFalse(selector.matches("p", attrs))
+        self.assertFalse(selector.matches("div", dict(attrs, id="d")))
+        self.assertTrue(SimpleSelector("[href]").matches("a", {"href": ""}))
+
+    def test_combinators_are_rejected(self):
+        for selector in ("div p", "ul > li", "a:first-child", ""):
+            with self.assertRaises(ValueError):
+                SimpleSelector(selector)
+
+
+class TestSelectorCapture(unittest.TestCase):
+    """Testing SelectorCapture"""
+
+    def test_matches_split_across_chunks(self):
+        html = "<body>{}<p>skip</p>{}</body>".format(
+            BLOCK.format(1), BLOCK.format(2)
+        )
+        capture = SelectorCapture("div.row")
+        captured = []
+        for char in html:
+            capture.feed(char)
+            captured.extend(capture.pop())
+        self.assertEqual(captured, [BLOCK.format(1), BLOCK.format(2)])
+
+    def test_implicitly_closed_and_void_elements(self):
+        capture = SelectorCapture("ul, img")
+        capture.feed("<ul><li>a<li>b<br></ul><img src=x><p>")
+        self.assertEqual(
+            capture.pop(), ["<ul><li>a<li>b<br></ul>", "<img src=x>"]
+        )
+
+    def test_optional_end_tags(self):
+        """a sibling start tag or the end of a parent ends the match"""
+        capture = SelectorCapture("li.x, td")
+        capture.feed("<ul><li class=x>a<li class=x>b<b>c</ul><p>after")
+        capture.feed("<table><tr><td>1<td>2<tr><td>3</table>")
+        self.assertEqual(
+            capture.pop(),
+            [
+                "<li class=x>a",
+                "<li class=x>b<b>c",
+                "<td>1",
+                "<td>2",
+                "<td>3",
+            ],
+        )
+
+    def test_open_match_completed_on_close(self):
+        capture = SelectorCapture("p")
+        capture.feed("<div><p>a<p>b")
+        self.assertEqual(capture.pop(), ["<p>a"])
+        capture.close()
+        self.assertEqual(capture.pop(), ["<p>b"])
+
+    def test_nested_matches_are_part_of_the_match(self):
+        capture = SelectorCapture("div.row")
+        capture.feed(
+            "<div class=row><div class=row>a</div></div><div class=row>b"
+        )
+        self.assertEqual(
+            capture.pop(), ["<div class=row><div class=row>a</div></div>"]
+        )
+
+
+class TestIterparse(unittest.TestCase):
+    """Testing Item.iterparse"""
+
+    @async_test
+    async def test_items_before_download_finishes(self):
+        first_item = asyncio.Event()
+
+        async def handler(request):
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(BLOCK.format(1).encode())
+            # the rest is sent once the first item was extracted
+            await asyncio.wait_for(first_item.wait(), 5)
+            for i in range(2, 5):
+                await response.write(BLOCK.format(i).encode())
+            await response.write_eof()
+            return response
+
+        runner, base = await start_server(handler)
+        names = []
+        try:
+            with patch.object(Row._meta, "base_url", base):
+                async for row in Row.iterparse("/", chunk_size=16):
+                    names.append(row.name)
+                    first_item.set()
+        finally:
+            await Row.close()
+            await runner.cleanup()
+        self.assertEqual(names, ["1", "2", "3", "4"])
+
+    @async_test
+    async def test_fetchers_without_streaming(self):
+        class WholeFetcher(Fetcher):
+            async def on_fetch(self, url, extra):
+                return "".join(BLOCK.format(i) for i in range(3))
+
+        with patch.object(Row._meta, "fetcher", WholeFetcher()):
+            rows = [row async for row in Row.iterparse("/")]
+        self.assertEqual([r.name for r in rows], ["0", "1", "2"])
+        self.assertEqual(rows[0].text, "x")
+
+    @async_test
+    async def test_same_items_as_all(self):
+        """items with optional end tags match those of Item.all"""
+
+        class Entry(data.Item):
+            name = data.TextField(selector="b")
+
+            class Meta:
+                selector = "li.x"
+
+        html = "<ul><li class=x><b>a</b><li class=x><b>b</b></ul><p>c"
+
+        class PageFetcher(Fetcher):
+            async def on_fetch(self, url, extra):
+                return html
+
+        with patch.object(Entry._meta, "fetcher", PageFetcher()):
+            streamed = [entry.name async for entry in Entry.iterparse("/")]
+            extracted = [entry.name for entry in await Entry.all("/")]
+        self.assertEqual(streamed, ["a", "b"])
+        self.assertEqual(streamed, extracted)
+
+    @async_test
+    async def test_table_rows_with_every_parser(self):
+        """rows parsed out of their table are kept by every backend"""
+        html = "<table>{}</table>".format(
+            "".join(
+                "<tr class=r><td>{}</td><td>x</td></tr>".format(i)
+                for i in range(1, 4)
+            )
+        )
+
+        class PageFetcher(Fetcher):
+            async def on_fetch(self, url, extra):
+                return html
+
+        for name, parser in PARSERS.items():
+            if not parser.is_available():
+                continue
+
+            class Line(data.Item):
+                number = data.TextField(selector="td")
+
+                class Meta:
+                    selector = "tr.r"
+                    fetcher = PageFetcher
+
+            Line._meta.parser = parser
+            Line._plan = ExtractionPlan(Line)
+            streamed = [line.number async for line in Line.iterparse("/")]
+            extracted = [line.number for line in await Line.all("/")]
+            self.assertEqual(streamed, ["1", "2", "3"], name)
+            self.assertEqual(streamed, extracted, name)
+
+    def test_markup_the_parser_drops(self):
+        """markup without a match raises instead of an IndexError"""
+        with self.assertRaises(ValueError):
+            Row._from_markup("<p>no row</p>", "http://a.com/")
+        self.assertEqual(
+            in_context("<td>1"),
+            "<table><tbody><tr><td>1</tr></tbody></table>",
+        )
+        self.assertEqual(in_context("text"), "text")
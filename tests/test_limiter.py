@@ -0,0 +1,60 @@
+"""testing request limiting"""
+import asyncio
+import time
+import unittest
+from tests.base import async_test
+from data.fetcher import Fetcher
+from data.limiter import Limiter, TokenBucket
+
+
+class SlowFetcher(Fetcher):
+    """fetcher recording how many fetches run at once"""
+
+    def __init__(self, *args, **kwargs):
+        super(SlowFetcher, self).__init__(*args, **kwargs)
+        self.running = 0
+        self.peak = 0
+
+    async def on_fetch(self, url, extra):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return url
+
+
+class TestLimiter(unittest.TestCase):
+    """Testing concurrency and rate limits"""
+
+    @async_test
+    async def test_concurrency_is_capped(self):
+        """no more than concurrency fetches run together"""
+        fetcher = SlowFetcher(concurrency=2)
+        urls = ["http://a.com/{}".format(i) for i in range(6)]
+        results = await asyncio.gather(*[fetcher.fetch(u) for u in urls])
+        self.assertListEqual(results, urls)
+        self.assertEqual(fetcher.peak, 2)
+
+    @async_test
+    async def test_unlimited_by_default(self):
+        """without limits every fetch runs at once"""
+        fetcher = SlowFetcher()
+        urls = ["http://a.com/{}".format(i) for i in range(4)]
+        await asyncio.gather(*[fetcher.fetch(u) for u in urls])
+        self.assertEqual(fetcher.peak, 4)
+
+    @async_test
+    async def test_token_bucket_rate(self):
+        """the bucket lets burst through and spaces the rest"""
+        bucket = TokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.035)
+
+    def test_bucket_per_host(self):
+        """hosts get their own buckets"""
+        limiter = Limiter(rate_limit=1)
+        first = limiter.bucket("http://a.com/1")
+        self.assertIs(first, limiter.bucket("http://a.com/2"))
+        self.assertIsNot(first, limiter.bucket("http://b.com/1"))
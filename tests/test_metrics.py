@@ -0,0 +1,89 @@
+"""testing crawl metrics"""
+import json
+import unittest
+from aiohttp import web
+from tests.base import async_test, start_server
+from data import data
+from data.fetcher import Fetcher, UrlFetcher
+from data.metrics import Metrics
+
+METRICS = Metrics(trace_fields=True)
+
+
+class PageFetcher(Fetcher):
+    """serves a fixed page, failing on /fail"""
+
+    async def on_fetch(self, url, extra):
+        if url.endswith("/fail"):
+            raise ValueError("failed")
+        return "<h1>title</h1><p>text</p>"
+
+
+class Page(data.Item):
+    """page reporting to METRICS"""
+
+    title = data.TextField(selector="h1")
+    text = data.TextField(selector="p")
+
+    class Meta:
+        base_url = "http://pages.com/"
+        fetcher = PageFetcher
+        metrics = METRICS
+
+
+class TestMetrics(unittest.TestCase):
+    """Testing Metrics"""
+
+    @async_test
+    async def test_request_timings(self):
+        """aiohttp requests report status, size and ttfb"""
+        metrics = Metrics()
+        events = []
+        metrics.on("request", lambda event, data: events.append(data))
+
+        async def handler(request):
+            return web.Response(text="hello")
+
+        runner, base = await start_server(handler)
+        try:
+            async with UrlFetcher(metrics=metrics) as fetcher:
+                await fetcher.fetch(base + "/")
+        finally:
+            await runner.cleanup()
+        self.assertEqual(events[0]["status"], 200)
+        self.assertEqual(events[0]["bytes"], 5)
+        self.assertIsNotNone(events[0]["ttfb"])
+        self.assertIsNotNone(events[0]["connect"])
+        self.assertEqual(metrics.in_flight, 0)
+
+    @async_test
+    async def test_item_parse_and_fields(self):
+        """items report parse and per field extraction times"""
+        events = []
+        parses = METRICS.summaries["parse_seconds", None].count
+        callback = METRICS.on("field", lambda event, data: events.append(data))
+        try:
+            await Page.one("/")
+        finally:
+            METRICS.off("field", callback)
+        self.assertListEqual([e["field"] for e in events], ["title", "text"])
+        self.assertEqual(
+            METRICS.summaries["parse_seconds", None].count, parses + 1
+        )
+
+    @async_test
+    async def test_errors_and_exporters(self):
+        """failures are counted and exported"""
+        await Page.one("/")
+        with self.assertRaises(ValueError):
+            await Page.one("/fail")
+        exported = json.loads(METRICS.to_json())
+        names = [c["name"] for c in exported["counters"]]
+        self.assertIn("errors_total", names)
+        prometheus = METRICS.to_prometheus()
+        self.assertIn('data_errors_total{host="pages.com"} 1', prometheus)
+        self.assertIn("# TYPE data_request_seconds summary", prometheus)
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            Metrics().on("nope", print)
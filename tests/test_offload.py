@@ -0,0 +1,142 @@
+"""testing parsing in worker processes"""
+import os
+import unittest
+from tests.base import async_test
+from data import data, offload
+from data.fetcher import Fetcher
+
+PAGE = "<ul><li>1</li><b><i>x</i></b></ul><ul><li>2</li><b><i>y</i></b></ul>"
+
+
+class PageFetcher(Fetcher):
+    """serves PAGE for every url"""
+
+    async def on_fetch(self, url, extra):
+        return PAGE
+
+
+class Tag(data.Item):
+    """nested item"""
+
+    text = data.TextField(selector="i")
+
+
+class Row(data.Item):
+    """row extracted in the parse pool"""
+
+    number = data.TextField(selector="li", coerce=lambda x: int(x))
+    tags = data.RelationalField(Tag, selector="b")
+
+    class Meta:
+        selector = "ul"
+        base_url = "http://rows.com/"
+        fetcher = PageFetcher
+        parse_workers = 2
+
+
+class LinkFetcher(Fetcher):
+    """serves a listing linking to a detail page"""
+
+    async def on_fetch(self, url, extra):
+        if url.endswith("/detail"):
+            return "<i>detail</i>"
+        return "<ul><li>1</li><b><a href='/detail'>d</a></b></ul>"
+
+
+class Linked(data.Item):
+    """nested item with sub pages"""
+
+    pages = data.SubPageFields(Tag, link_selector="a")
+
+    class Meta:
+        base_url = "http://rows.com/"
+        fetcher = LinkFetcher
+
+
+class Listing(data.Item):
+    """offloading parent of items with sub pages"""
+
+    number = data.TextField(selector="li", coerce=lambda x: int(x))
+    linked = data.RelationalField(Linked, selector="b")
+
+    class Meta:
+        selector = "ul"
+        base_url = "http://rows.com/"
+        fetcher = LinkFetcher
+        parse_workers = 2
+
+
+PARENT = os.getpid()
+
+
+def fails_in_workers(value):
+    if os.getpid() != PARENT:
+        raise AttributeError("extraction failed")
+    return value
+
+
+class Failing(data.Item):
+    """item whose extraction fails in the workers only"""
+
+    number = data.TextField(selector="li", coerce=fails_in_workers)
+
+    class Meta:
+        selector = "ul"
+        base_url = "http://rows.com/"
+        fetcher = PageFetcher
+        parse_workers = 2
+
+
+class TestOffload(unittest.TestCase):
+    """Testing offloaded extraction"""
+
+    @classmethod
+    def tearDownClass(cls):
+        offload.shutdown()
+
+    @async_test
+    async def test_items_extracted_in_workers(self):
+        """workers send back values, items come back detached"""
+        rows = await Row.all("/")
+        self.assertListEqual([r.number for r in rows], [1, 2])
+        self.assertIsNone(rows[0]._q)
+        self.assertEqual(rows[1].tags[0].text, "y")
+        self.assertIsNone(rows[1].tags[0]._q)
+
+    @async_test
+    async def test_local_class_falls_back(self):
+        """classes workers cannot import are extracted on the loop"""
+
+        class LocalRow(Row):
+            pass
+
+        self.assertIsNone(offload.item_path(LocalRow))
+        rows = await LocalRow.all("/")
+        self.assertListEqual([r.number for r in rows], [1, 2])
+        self.assertIsNotNone(rows[0]._q)
+
+    @async_test
+    async def test_nested_sub_pages_stay_on_the_loop(self):
+        """nested items with sub pages keep their document"""
+        self.assertFalse(offload.needs_document(Row))
+        self.assertTrue(offload.needs_document(Listing))
+        rows = await Listing.all("/")
+        linked = rows[0].linked[0]
+        self.assertIsNotNone(linked._q)
+        pages = await linked.pages
+        self.assertListEqual([page.text for page in pages], ["detail"])
+        resolved = await Listing.resolve("/")
+        pages = resolved[0].linked[0].values["pages"]
+        self.assertListEqual([page.text for page in pages], ["detail"])
+
+    @async_test
+    async def test_extraction_errors_propagate(self):
+        """errors of the extraction are not taken for offload failures"""
+        with self.assertRaises(AttributeError):
+            await Failing.all("/")
+
+    def test_item_path_roundtrip(self):
+        """module level classes are importable by path"""
+        path = offload.item_path(Row)
+        self.assertEqual(path, "tests.test_offload:Row")
+        self.assertIs(offload.load_item(path), Row)
@@ -0,0 +1,58 @@
+"""conformance of the field tests across parser backends"""
+import unittest
+from tests import test_fields as fields
+from data import data
+from data.parsers import PARSERS, SelectolaxNode, get_parser
+
+FIELD_TESTS = (
+    fields.TestTextField,
+    fields.TestAttributeValueField,
+    fields.TestHtmlField,
+    fields.TestRelationalField,
+    fields.TestDomObjectField,
+)
+
+
+def conformance(name):
+    """runs every field test parsing with the named backend"""
+    backend = PARSERS[name]
+    skip = unittest.skipUnless(
+        backend.is_available(), "{} is not installed".format(name)
+    )
+    for case in FIELD_TESTS:
+        title = "{}_{}".format(case.__name__, name.replace(".", "_"))
+        attrs = {"parse": staticmethod(backend.parse)}
+        globals()[title] = skip(type(title, (case,), attrs))
+
+
+for _name in PARSERS:
+    conformance(_name)
+
+
+class Listing(data.Item):
+    """item parsed with selectolax"""
+
+    names = data.TextField(selector="li", repeated=True)
+    classes = data.AttributeValueField(selector="li", attr="class")
+
+    class Meta:
+        parser = "selectolax"
+
+
+class TestParserBackends(unittest.TestCase):
+    """Testing backend selection"""
+
+    def test_unknown_parser(self):
+        """unknown backends are refused"""
+        with self.assertRaises(ValueError):
+            get_parser("nope")
+
+    @unittest.skipUnless(
+        PARSERS["selectolax"].is_available(), "selectolax is not installed"
+    )
+    def test_item_with_selectolax(self):
+        """an item extracts through the backend of its Meta"""
+        item = Listing("<ul><li class='a b'>1</li><li>2</li></ul>")
+        self.assertIsInstance(item._q, SelectolaxNode)
+        self.assertListEqual(item.names, ["1", "2"])
+        self.assertListEqual(item.classes, ["a", "b"])
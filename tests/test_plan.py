@@ -0,0 +1,106 @@
+"""testing compiled extraction plans"""
+import unittest
+from unittest.mock import patch
+from data import data
+from data.plan import selects_once
+
+
+class UpperField(data.TextField):
+    """custom field overriding get_value only"""
+
+    def get_value(self, q):
+        return super(UpperField, self).get_value(q).upper()
+
+
+class Product(data.Item):
+    """product sharing one selector between fields"""
+
+    name = data.TextField(selector="li")
+    names = data.TextField(selector="li", repeated=True)
+    kind = data.AttributeValueField(selector="li", attr="class")
+    shout = UpperField(selector="li")
+
+    def clean_name(self, value):
+        return "{}!".format(value)
+
+    @staticmethod
+    def clean_names(value):
+        return list(reversed(value))
+
+
+class TestExtractionPlan(unittest.TestCase):
+    """Testing ExtractionPlan"""
+
+    def test_shared_selector_selected_once(self):
+        """fields sharing a selector walk the tree once"""
+        plan = Product._plan
+        select = plan.selects["li"]
+        with patch.dict(plan.selects) as selects:
+            calls = []
+
+            def counting(q):
+                calls.append(q)
+                return select(q)
+
+            selects["li"] = counting
+            item = Product("<ul><li class='x'>a</li><li>b</li></ul>")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(item.name, "a!")
+        self.assertListEqual(item.names, ["b", "a"])
+        self.assertListEqual(item.kind, ["x"])
+        self.assertEqual(item.shout, "A")
+
+    def test_overridden_get_value_is_kept(self):
+        """fields overriding get_value only are not grouped"""
+        self.assertFalse(selects_once(Product._fields["shout"]))
+        self.assertTrue(selects_once(Product._fields["kind"]))
+        self.assertFalse(selects_once(data.AttributeValueField(attr="a")))
+
+
+class LazyProduct(data.Item):
+    """item extracting fields on access"""
+
+    name = data.TextField(selector="h2")
+    price = data.TextField(selector=".price", coerce=float)
+    body = data.DomObjectField(selector="p")
+
+    class Meta:
+        lazy = True
+
+    def clean_name(self, value):
+        return value.strip()
+
+
+LAZY_HTML = "<div><h2> Lamp </h2><span class='price'>9.5</span><p>x</p></div>"
+
+
+class TestLazyItem(unittest.TestCase):
+    """Testing Meta.lazy"""
+
+    def test_nothing_extracted_on_init(self):
+        with patch.object(data.DomObjectField, "extract") as extract:
+            product = LazyProduct(LAZY_HTML)
+            self.assertEqual(product.name, "Lamp")
+            extract.assert_not_called()
+
+    def test_fields_are_memoized(self):
+        product = LazyProduct(LAZY_HTML)
+        with patch.object(
+            LazyProduct._plan,
+            "extract_field",
+            wraps=product._plan.extract_field,
+        ) as extract_field:
+            self.assertEqual(product.price, 9.5)
+            self.assertEqual(product.price, 9.5)
+        self.assertEqual(extract_field.call_count, 1)
+
+    def test_values_force_the_rest(self):
+        product = LazyProduct(LAZY_HTML)
+        self.assertEqual(product.name, "Lamp")
+        values = product.json()
+        self.assertEqual(sorted(values), ["body", "name", "price"])
+        self.assertEqual(values["price"], 9.5)
+        self.assertEqual(product.detach().name, "Lamp")
+
+    def test_class_attribute_is_the_field(self):
+        self.assertIsInstance(LazyProduct.name, data.TextField)
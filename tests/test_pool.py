@@ -0,0 +1,112 @@
+"""testing the webdriver pool"""
+import gc
+import unittest
+import weakref
+from tests.base import async_test
+from data.fetcher import PhatomJSFetcher
+from data import pool as pools
+from data.pool import DriverPool
+
+
+class FakeDriver(object):
+    """stands in for a webdriver without a browser"""
+
+    created = 0
+
+    def __init__(self, **kwargs):
+        FakeDriver.created += 1
+        self.kwargs = kwargs
+        self.current_url = None
+        self.quitted = False
+
+    def get(self, url):
+        self.current_url = url
+
+    @property
+    def page_source(self):
+        return "<p>{}</p>".format(self.current_url)
+
+    def quit(self):
+        self.quitted = True
+
+
+class TestDriverPool(unittest.TestCase):
+    """Testing DriverPool"""
+
+    def setUp(self):
+        super(TestDriverPool, self).setUp()
+        FakeDriver.created = 0
+
+    def test_driver_is_reused(self):
+        """a checked in driver is handed out again"""
+        pool = DriverPool(FakeDriver, size=2)
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(FakeDriver.created, 1)
+
+    def test_driver_recycled_after_max_pages(self):
+        """a driver is retired once it served max_pages"""
+        pool = DriverPool(FakeDriver, size=1, max_pages=2)
+        drivers = []
+        for _ in range(3):
+            with pool.driver() as driver:
+                drivers.append(driver)
+        self.assertIs(drivers[0], drivers[1])
+        self.assertIsNot(drivers[1], drivers[2])
+        self.assertTrue(drivers[0].quitted)
+
+    def test_unhealthy_driver_replaced(self):
+        """drivers failing the health check are not handed out"""
+        pool = DriverPool(
+            FakeDriver, size=1, health_check=lambda d: not d.current_url
+        )
+        with pool.driver() as driver:
+            driver.get("http://dead")
+        with pool.driver() as fresh:
+            pass
+        self.assertIsNot(driver, fresh)
+        self.assertTrue(driver.quitted)
+
+    def test_pool_is_bounded(self):
+        """checkout times out when every driver is busy"""
+        pool = DriverPool(FakeDriver, size=1)
+        pool.checkout()
+        with self.assertRaises(TimeoutError):
+            pool.checkout(timeout=0.01)
+
+    def test_close_quits_drivers(self):
+        """close quits idle drivers"""
+        pool = DriverPool(FakeDriver, size=1)
+        with pool.driver() as driver:
+            pass
+        pool.close()
+        self.assertTrue(driver.quitted)
+
+    def test_closed_at_exit_without_being_kept_alive(self):
+        pool = DriverPool(FakeDriver, size=1)
+        with pool.driver() as driver:
+            pass
+        pools.close_pools()
+        self.assertTrue(driver.quitted)
+        ref = weakref.ref(pool)
+        del pool
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+class TestPhatomJSFetcher(unittest.TestCase):
+    """Testing the pooled phantomjs fetcher"""
+
+    @async_test
+    async def test_fetch_uses_pool(self):
+        """pages are rendered on pooled drivers"""
+        FakeDriver.created = 0
+        async with PhatomJSFetcher(driver_factory=FakeDriver) as fetcher:
+            first = await fetcher.fetch("http://a.com/1")
+            second = await fetcher.fetch("http://a.com/2")
+        self.assertEqual(first, "<p>http://a.com/1</p>")
+        self.assertEqual(second, "<p>http://a.com/2</p>")
+        self.assertEqual(FakeDriver.created, 1)
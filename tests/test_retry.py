@@ -0,0 +1,161 @@
+"""testing retries, timeouts and circuit breaking"""
+import asyncio
+import unittest
+from unittest.mock import patch
+from tests.base import async_test
+from data.fetcher import Fetcher
+from data.metrics import Metrics
+from data.requests import Response
+from data.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    FetchError,
+    RetryPolicy,
+)
+
+
+class FlakyFetcher(Fetcher):
+    """answers the queued statuses, then 200"""
+
+    def __init__(self, statuses=(), delay=0, **kwargs):
+        super(FlakyFetcher, self).__init__(**kwargs)
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.calls = 0
+
+    async def on_fetch(self, url, extra):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else 200
+        return Response(url, status, {}, "body {}".format(status))
+
+
+class TestRetry(unittest.TestCase):
+    """Testing Fetcher retries"""
+
+    @async_test
+    async def test_transient_status_is_retried(self):
+        fetcher = FlakyFetcher([503, 502], retries=2, backoff=0.001)
+        self.assertEqual(await fetcher.fetch("http://a.com/"), "body 200")
+        self.assertEqual(fetcher.calls, 3)
+
+    @async_test
+    async def test_exhausted_retries_raise(self):
+        fetcher = FlakyFetcher([503] * 3, retries=1, backoff=0.001)
+        with self.assertRaises(FetchError) as ctx:
+            await fetcher.fetch("http://a.com/")
+        self.assertEqual(ctx.exception.status, 503)
+        self.assertEqual(fetcher.calls, 2)
+
+    @async_test
+    async def test_without_retries_status_is_an_error(self):
+        """a transient status is a failed fetch even when not retried"""
+        fetcher = FlakyFetcher([503])
+        result = await fetcher.fetch_result("http://a.com/")
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error.status, 503)
+        self.assertEqual(fetcher.calls, 1)
+
+    @async_test
+    async def test_statuses_can_be_returned(self):
+        """without retry_statuses every answer is returned"""
+        fetcher = FlakyFetcher([503], retry_statuses=())
+        self.assertEqual(await fetcher.fetch("http://a.com/"), "body 503")
+
+    @async_test
+    async def test_timeout(self):
+        fetcher = FlakyFetcher(delay=1, timeout=0.01)
+        result = await fetcher.fetch_result("http://a.com/")
+        self.assertFalse(result.ok)
+        self.assertIsInstance(result.error, asyncio.TimeoutError)
+
+    @async_test
+    async def test_timeouts_are_reported_to_metrics(self):
+        """timed out attempts end as failures in the metrics"""
+        metrics = Metrics()
+        errors = []
+        metrics.on("error", lambda event, data: errors.append(data))
+        fetcher = FlakyFetcher(
+            [503] * 3,
+            delay=1,
+            timeout=0.01,
+            retries=2,
+            backoff=0.001,
+            metrics=metrics,
+        )
+        result = await fetcher.fetch_result("http://a.com/")
+        self.assertIsInstance(result.error, asyncio.TimeoutError)
+        self.assertEqual(fetcher.calls, 3)
+        self.assertEqual(metrics.in_flight, 0)
+        self.assertEqual(len(errors), 3)
+        self.assertIsInstance(errors[0]["error"], asyncio.TimeoutError)
+
+    @async_test
+    async def test_cancellations_are_reported_to_metrics(self):
+        """a cancelled request ends as a failure in the metrics"""
+        metrics = Metrics()
+        fetcher = FlakyFetcher(delay=1, metrics=metrics)
+        task = asyncio.ensure_future(fetcher.fetch("http://a.com/"))
+        await asyncio.sleep(0.01)
+        self.assertEqual(metrics.in_flight, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        self.assertEqual(metrics.in_flight, 0)
+        self.assertEqual(
+            metrics.counters["errors_total", ("host", "a.com")], 1
+        )
+
+    @async_test
+    async def test_backoff_delays(self):
+        """retries wait a jittered exponential delay"""
+        fetcher = FlakyFetcher([503, 503], retries=2, backoff=1)
+        delays = []
+        with patch.object(fetcher.retry, "delay") as delay:
+            delay.side_effect = (
+                lambda attempt: delays.append(
+                    RetryPolicy.delay(fetcher.retry, attempt)
+                )
+                or 0
+            )
+            await fetcher.fetch("http://a.com/")
+        self.assertEqual(len(delays), 2)
+        self.assertLessEqual(delays[0], 1)
+        self.assertLessEqual(delays[1], 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Testing CircuitBreaker"""
+
+    @async_test
+    async def test_open_circuit_stops_calls(self):
+        fetcher = FlakyFetcher(
+            [500, 500], retries=1, backoff=0.001, breaker_threshold=2
+        )
+        with self.assertRaises(FetchError):
+            await fetcher.fetch("http://a.com/1")
+        with self.assertRaises(CircuitOpenError):
+            await fetcher.fetch("http://a.com/2")
+        self.assertEqual(fetcher.calls, 2)
+        self.assertEqual(await fetcher.fetch("http://b.com/"), "body 200")
+
+    @async_test
+    async def test_opens_without_retries(self):
+        """a host answering transient statuses trips the breaker"""
+        fetcher = FlakyFetcher([503] * 5, breaker_threshold=2)
+        results = [
+            await fetcher.fetch_result("http://a.com/{}".format(i))
+            for i in range(5)
+        ]
+        self.assertEqual(fetcher.calls, 2)
+        self.assertTrue(fetcher.breaker.is_open("http://a.com/"))
+        self.assertFalse(any(result.ok for result in results))
+        self.assertIsInstance(results[-1].error, CircuitOpenError)
+
+    def test_half_open_after_reset(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.failure("http://a.com/")
+        breaker.check("http://a.com/")
+        breaker.success("http://a.com/")
+        self.assertFalse(breaker.is_open("http://a.com/"))
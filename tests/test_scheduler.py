@@ -0,0 +1,102 @@
+"""testing item graph resolution"""
+import asyncio
+import unittest
+from unittest.mock import patch
+from tests.base import async_test
+from data import data
+from data.fetcher import Fetcher
+from data.scheduler import Scheduler
+
+SITE = {
+    "http://shop.com/": "<div class='p'><a href='/d/1'></a></div>"
+    "<div class='p'><a href='/d/2'></a><a href='/d/1'></a></div>",
+    "http://shop.com/d/1": "<h1>one</h1><a href='/r/1'></a><a href='/r/2'></a>",
+    "http://shop.com/d/2": "<h1>two</h1><a href='/r/3'></a>",
+    "http://shop.com/r/1": "<p>good</p>",
+    "http://shop.com/r/2": "<p>bad</p>",
+    "http://shop.com/r/3": "<p>fine</p>",
+}
+
+
+class SiteFetcher(Fetcher):
+    """serves SITE, counting concurrent and total requests"""
+
+    def __init__(self, **kwargs):
+        super(SiteFetcher, self).__init__(**kwargs)
+        self.fetched = []
+        self.active = 0
+        self.max_active = 0
+
+    async def on_fetch(self, url, extra):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.fetched.append(url)
+        return SITE[url]
+
+
+class Review(data.Item):
+    text = data.TextField(selector="p")
+
+
+class Detail(data.Item):
+    name = data.TextField(selector="h1")
+    reviews = data.SubPageFields(Review, link_selector="a")
+
+    class Meta:
+        base_url = "http://shop.com/"
+
+
+class Product(data.Item):
+    details = data.SubPageFields(Detail, link_selector="a")
+
+    class Meta:
+        selector = ".p"
+        base_url = "http://shop.com/"
+
+
+class TestScheduler(unittest.TestCase):
+    """Testing Scheduler"""
+
+    def setUp(self):
+        self.fetcher = SiteFetcher()
+        for item in (Product, Detail, Review):
+            patcher = patch.object(item._meta, "fetcher", self.fetcher)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @async_test
+    async def test_three_levels_in_one_call(self):
+        products = await Product.resolve("/", workers=2)
+        second = products[1].values["details"]
+        self.assertEqual([d.name for d in second], ["two", "one"])
+        reviews = second[1].values["reviews"]
+        self.assertEqual([r.text for r in reviews], ["good", "bad"])
+        self.assertLessEqual(self.fetcher.max_active, 2)
+        # every page once, awaiting the fields fetches nothing more
+        self.assertEqual(len(self.fetcher.fetched), len(SITE))
+        details = await products[0].details
+        self.assertEqual(details[0].name, "one")
+        self.assertEqual(len(self.fetcher.fetched), len(SITE))
+
+    @async_test
+    async def test_breadth_first(self):
+        await Product.resolve("/", workers=1)
+        depths = [url.split("/")[3] for url in self.fetcher.fetched[1:]]
+        self.assertEqual(depths, ["d", "d", "r", "r", "r"])
+
+    @async_test
+    async def test_max_depth(self):
+        products = await Product.resolve("/", max_depth=0)
+        self.assertEqual(len(self.fetcher.fetched), 3)
+        detail = products[0].values["details"][0]
+        self.assertNotIn("reviews", detail.values)
+
+    @async_test
+    async def test_failures_are_kept(self):
+        product = Product("<div class='p'><a href='/missing'></a></div>")
+        await Scheduler().resolve([product])
+        details = product.values["details"]
+        self.assertEqual(list(details), [])
+        self.assertIsInstance(details.failures[0].error, KeyError)
@@ -0,0 +1,129 @@
+"""testing the export sinks"""
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from tests.base import async_test
+from data import data
+from data.retry import FetchResult
+from data.sinks import CsvSink, JsonLinesSink, ParquetSink, pyarrow
+
+
+class Tag(data.Item):
+    """nested item"""
+
+    name = data.TextField(selector="b")
+
+
+class Post(data.Item):
+    """item with nested and repeated values"""
+
+    title = data.TextField(selector="h2")
+    tags = data.RelationalField(Tag, selector="i", repeated=True)
+
+    class Meta:
+        selector = ".post"
+
+
+HTML = "".join(
+    "<div class='post'><h2>{0}</h2><i><b>a{0}</b></i></div>".format(i)
+    for i in range(5)
+)
+
+
+class CountingFile(io.StringIO):
+    """counts the write calls"""
+
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super(CountingFile, self).write(text)
+
+
+def posts():
+    return [Post(item=node) for node in data._q(HTML).select(".post")]
+
+
+class TestJsonLinesSink(unittest.TestCase):
+    """Testing JsonLinesSink"""
+
+    def test_items_are_written_in_batches(self):
+        output = CountingFile()
+        with JsonLinesSink(output, batch_size=2) as sink:
+            sink.write_all(posts())
+            self.assertEqual(output.writes, 2)
+        self.assertEqual(output.writes, 3)
+        self.assertEqual(sink.written, 5)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(rows[1], {"title": "1", "tags": [{"name": "a1"}]})
+
+    def test_path_is_opened_and_closed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "posts.jsonl")
+            with JsonLinesSink(path) as sink:
+                sink.write_all(posts())
+            with open(path) as lines:
+                self.assertEqual(len(lines.readlines()), 5)
+
+    @async_test
+    async def test_consume_stream_and_results(self):
+        async def stream():
+            for post in posts():
+                yield FetchResult("/", post, None)
+            yield FetchResult("/x", None, ValueError("boom"))
+
+        output = io.StringIO()
+        async with JsonLinesSink(output) as sink:
+            await sink.consume(stream())
+        self.assertEqual(len(output.getvalue().splitlines()), 5)
+        self.assertEqual(sink.failures[0].url, "/x")
+
+    @async_test
+    async def test_consume_awaitable(self):
+        async def everything():
+            return posts()
+
+        output = io.StringIO()
+        async with JsonLinesSink(output) as sink:
+            await sink.consume(everything())
+        self.assertEqual(sink.written, 5)
+
+
+class TestCsvSink(unittest.TestCase):
+    """Testing CsvSink"""
+
+    def test_header_and_nested_values(self):
+        output = io.StringIO()
+        with CsvSink(output, batch_size=2) as sink:
+            sink.write_all(posts())
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4]["title"], "4")
+        self.assertEqual(json.loads(rows[4]["tags"]), [{"name": "a4"}])
+
+    def test_selected_fields(self):
+        output = io.StringIO()
+        with CsvSink(output, fields=["title"]) as sink:
+            sink.write_all(posts())
+        self.assertEqual(output.getvalue().splitlines()[:2], ["title", "0"])
+
+
+@unittest.skipUnless(pyarrow, "pyarrow is not installed")
+class TestParquetSink(unittest.TestCase):
+    """Testing ParquetSink"""
+
+    def test_row_group_per_batch(self):
+        import pyarrow.parquet
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "posts.parquet")
+            with ParquetSink(path, batch_size=2) as sink:
+                sink.write_all(posts())
+            parquet = pyarrow.parquet.ParquetFile(path)
+            self.assertEqual(parquet.metadata.num_row_groups, 3)
+            table = parquet.read()
+        self.assertEqual(table.column("title").to_pylist()[3], "3")
+        self.assertEqual(table.column("tags").to_pylist()[0], [{"name": "a0"}])